@@ -6,7 +6,8 @@
 __license__ = "LGPL 3.0"
 __version__ = "1.7.2"
 
-from .fpdf import FPDF, FPDF_FONT_DIR, FPDF_VERSION, SYSTEM_TTFONTS, set_global, FPDF_CACHE_MODE, FPDF_CACHE_DIR
+from .fpdf import FPDF, CompressionPolicy, FPDF_FONT_DIR, FPDF_VERSION, SYSTEM_TTFONTS, set_global, FPDF_CACHE_MODE, FPDF_CACHE_DIR, \
+                  preload_ttfont, evict_ttfont
 try:
     from .html import HTMLMixin
 except ImportError:
@@ -17,20 +17,27 @@ from __future__ import division, with_statement
 
 from datetime import datetime
 from functools import wraps
+from contextlib import contextmanager
 import math
 import errno
-import os, sys, zlib, struct, re, tempfile, struct
+from bisect import bisect_left, bisect_right
+import os, sys, zlib, struct, re, tempfile, struct, codecs
+from multiprocessing.pool import ThreadPool
+import threading
 
 from .ttfonts import TTFontFile
 from .fonts import fpdf_charwidths
-from .php import substr, sprintf, print_r, UTF8ToUTF16BE, UTF8StringToArray
-from .py3k import PY3K, pickle, urlopen, BytesIO, Image, basestring, unicode, exception, b, hashpath
+from .php import substr, sprintf, print_r, UTF8ToUTF16BE
+from .py3k import PY3K, pickle, urlopen, BytesIO, Image, basestring, unicode, exception, b, hashpath, OrderedDict, \
+                  accumulate
 
 # Global variables
 FPDF_VERSION = '1.7.2'
 FPDF_FONT_DIR = os.path.join(os.path.dirname(__file__),'font')
 FPDF_CACHE_MODE = 0 # 0 - in same folder, 1 - none, 2 - hash
 FPDF_CACHE_DIR = None
+FPDF_SUBSET_CACHE_SIZE = 32 # font subsets kept in memory (0 - none)
+FPDF_SUBSET_CACHE_DIR = None # font subsets also stored in this folder
 SYSTEM_TTFONTS = None
 
 PAGE_FORMATS = {
@@ -41,9 +48,44 @@ PAGE_FORMATS = {
     "legal": (612, 1008),
 }
 
+# Content stream operators with coordinates (formatted with set_precision)
+OPERATORS = {
+    'w': '%.2f w',
+    'Tw': '%.3f Tw',
+    're': '%.2f %.2f %.2f %.2f re %s',
+    'line': '%.2f %.2f m %.2f %.2f l S',
+    'Td': 'BT %.2f %.2f Td',
+    'Tw Td': 'BT 0 Tw %.2f %.2f Td [',
+    'm c': '%.2f %.2f m %.2f %.2f %.2f %.2f %.2f %.2f c',
+    'c': '%.2f %.2f %.2f %.2f %.2f %.2f c',
+    'c op': '%.2f %.2f %.2f %.2f %.2f %.2f c %s',
+    'image': 'q %.2f 0 0 %.2f %.2f %.2f cm /I%d Do Q',
+    'stamp': 'q 1 0 0 1 %.2f %.2f cm /S%d Do Q',
+}
+
 def set_global(var, val):
     globals()[var] = val
 
+def char_widths(cw):
+    "Return the widths of the 256 characters of a (non unicode) font"
+    # a tuple is indexed faster than an array (no int object created)
+    return tuple([cw.get(chr(i), 0) for i in range(256)])
+
+class TrimmedFormat(object):
+    "Operator format removing trailing zeros of numbers (smaller output)"
+
+    trim = re.compile(r'(\.[0-9]*?)0+(?=[ \]]|$)')
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+
+    def __mod__(self, args):
+        return self.trim.sub(self._trimmed, self.fmt % args)
+
+    @staticmethod
+    def _trimmed(match):
+        return match.group(1).rstrip('.')
+
 def load_cache(filename):
     """Return unpickled object, or None if cache unavailable"""
     if not filename:
@@ -54,23 +96,214 @@ def load_cache(filename):
     except (IOError, ValueError):  # File missing, unsupported pickle, etc
         return None
 
+def save_cache(filename, obj):
+    "Pickle an object to a cache file, unless it can't be written"
+    try:
+        with open(filename, "wb") as fh:
+            pickle.dump(obj, fh)
+    except IOError:
+        if not exception().errno == errno.EACCES:
+            raise  # Not a permission error.
+
+# Metrics of the TrueType fonts loaded by this process, shared (read only) by
+# all documents: {(path, modification time, size): metrics}
+FONT_METRICS = {}
+
+def find_ttfont(fname):
+    "Return the path of a TrueType font file (searched in the font dirs)"
+    if os.path.exists(fname):
+        return fname
+    elif (FPDF_FONT_DIR and
+        os.path.exists(os.path.join(FPDF_FONT_DIR, fname))):
+        return os.path.join(FPDF_FONT_DIR, fname)
+    elif (SYSTEM_TTFONTS and
+        os.path.exists(os.path.join(SYSTEM_TTFONTS, fname))):
+        return os.path.join(SYSTEM_TTFONTS, fname)
+    raise RuntimeError("TTF Font file not found: %s" % fname)
+
+def ttfont_cache_file(ttffilename):
+    "Return the metrics cache (.pkl) file of a font (None if not cached)"
+    if FPDF_CACHE_MODE == 0:
+        return os.path.splitext(ttffilename)[0] + '.pkl'
+    elif FPDF_CACHE_MODE == 2:
+        return os.path.join(FPDF_CACHE_DIR, hashpath(ttffilename) + ".pkl")
+    return None
+
+def load_ttfont(ttffilename, fontkey=''):
+    "Return the metrics of a TrueType font, read once per process"
+    path = os.path.abspath(ttffilename)
+    st = os.stat(path)
+    key = (path, st.st_mtime, st.st_size)
+    unifilename = ttfont_cache_file(ttffilename)
+    font_dict = FONT_METRICS.get(key)
+    if font_dict is not None:
+        if unifilename and not os.path.exists(unifilename):
+            # loaded with another cache mode
+            save_cache(unifilename, font_dict)
+        return font_dict
+    font_dict = load_cache(unifilename)
+    if font_dict is None:
+        ttf = TTFontFile()
+        ttf.getMetrics(ttffilename)
+        desc = {
+            'Ascent': int(round(ttf.ascent, 0)),
+            'Descent': int(round(ttf.descent, 0)),
+            'CapHeight': int(round(ttf.capHeight, 0)),
+            'Flags': ttf.flags,
+            'FontBBox': "[%s %s %s %s]" % (
+                int(round(ttf.bbox[0], 0)),
+                int(round(ttf.bbox[1], 0)),
+                int(round(ttf.bbox[2], 0)),
+                int(round(ttf.bbox[3], 0))),
+            'ItalicAngle': int(ttf.italicAngle),
+            'StemV': int(round(ttf.stemV, 0)),
+            'MissingWidth': int(round(ttf.defaultWidth, 0)),
+            }
+        # Generate metrics .pkl file
+        font_dict = {
+            'name': re.sub('[ ()]', '', ttf.fullName),
+            'type': 'TTF',
+            'desc': desc,
+            'up': round(ttf.underlinePosition),
+            'ut': round(ttf.underlineThickness),
+            'ttffile': ttffilename,
+            'fontkey': fontkey,
+            'originalsize': os.stat(ttffilename).st_size,
+            'cw': ttf.charWidths,
+            'missingwidth': ttf.defaultWidth,
+            'composites': ttf.compositeGlyphs,
+            }
+        if unifilename:
+            save_cache(unifilename, font_dict)
+        del ttf
+    # the font file changed: forget its previous metrics
+    evict_ttfont(path)
+    FONT_METRICS[key] = font_dict
+    return font_dict
+
+def preload_ttfont(fname):
+    "Load the metrics of a TrueType font for the documents to be created"
+    load_ttfont(find_ttfont(fname))
+
+def evict_ttfont(fname=None):
+    "Forget the metrics and subsets of a TrueType font (all fonts by default)"
+    if fname is None:
+        FONT_METRICS.clear()
+        if FONT_SUBSETS is not None:
+            with FONT_SUBSETS_LOCK:
+                FONT_SUBSETS.clear()
+        return
+    try:
+        fname = find_ttfont(fname)
+    except RuntimeError:
+        pass                            # the font file was removed
+    path = os.path.abspath(fname)
+    for key in list(FONT_METRICS):
+        if key[0] == path:
+            del FONT_METRICS[key]
+    if FONT_SUBSETS is not None:
+        with FONT_SUBSETS_LOCK:
+            for key in list(FONT_SUBSETS):
+                if key[0] == path:
+                    del FONT_SUBSETS[key]
+
+# Subsets of TrueType fonts embedded by this process, reused by documents using
+# the same characters (least recently used first): {(path, modification time,
+# size, compression level, characters): (fontstream, size, cidtogidmap, widths)}
+FONT_SUBSETS = OrderedDict() if OrderedDict else None
+# documents may be created in several threads
+FONT_SUBSETS_LOCK = threading.Lock()
+
+def ttfont_subset_key(font, level):
+    "Return the key of the subset of a TrueType font used in a document"
+    path = os.path.abspath(font['ttffile'])
+    st = os.stat(path)
+    return (path, st.st_mtime, st.st_size, level, tuple(sorted(font['subset'])))
+
+def ttfont_subset_file(key):
+    "Return the subset cache (.pkl) file of a font (None if not stored)"
+    if not FPDF_SUBSET_CACHE_DIR:
+        return None
+    return os.path.join(FPDF_SUBSET_CACHE_DIR,
+                        hashpath(repr(key)) + ".subset.pkl")
+
+def load_ttfont_subset(key):
+    "Return a previously embedded font subset, or None if not cached"
+    if FONT_SUBSETS is None:            # Python < 2.7
+        return None
+    with FONT_SUBSETS_LOCK:
+        subset = FONT_SUBSETS.pop(key, None)
+    if subset is None:
+        cached = load_cache(ttfont_subset_file(key))
+        if cached is None or cached[0] != key:
+            return None
+        subset = cached[1]
+    cache_ttfont_subset(key, subset)
+    return subset
+
+def save_ttfont_subset(key, subset):
+    "Keep an embedded font subset for the next documents"
+    if FONT_SUBSETS is None:
+        return
+    cache_ttfont_subset(key, subset)
+    filename = ttfont_subset_file(key)
+    if filename:
+        save_cache(filename, (key, subset))
+
+def cache_ttfont_subset(key, subset):
+    "Store a font subset in memory as the most recently used one"
+    with FONT_SUBSETS_LOCK:
+        FONT_SUBSETS[key] = subset
+        while len(FONT_SUBSETS) > FPDF_SUBSET_CACHE_SIZE:
+            FONT_SUBSETS.popitem(last=False)
+
+class CompressionPolicy(object):
+    """Select the zlib compression level used for each kind of stream
+
+    Kinds of streams: "page" (page contents), "font" (embedded unicode font
+    subsets and their CIDToGIDMap), "image" (palettes, PNG images with
+    alpha channel and raw image data) and "object" (object streams and
+    cross-reference stream, see FPDF.set_object_streams). Image data that is already encoded
+    (JPEG, PNG) is embedded as is and never recompressed."""
+
+    def __init__(self, level=-1, levels=None):
+        self.level = level              # default zlib level (-1: zlib's)
+        self.levels = levels or {}      # level by kind (None: no compression)
+
+    def get_level(self, kind):
+        "Return the zlib level for a kind of stream, None to store it as is"
+        return self.levels.get(kind, self.level)
+
 class FPDF(object):
     "PDF Generation class"
 
-    def __init__(self, orientation = 'P', unit = 'mm', format = 'A4'):
+    def __init__(self, orientation = 'P', unit = 'mm', format = 'A4',
+                 stream = None, compress_workers = 0):
         # Some checks
         self._dochecks()
         # Initialization of properties
         self.offsets = {}               # array of object offsets
         self.page = 0                   # current page number
         self.n = 2                      # current object number
-        self.buffer = ''                # buffer holding in-memory PDF
+        self.buffer = bytearray()       # buffer holding in-memory PDF
+        self.buffer_size = 0            # length of in-memory PDF (offsets)
+        self.stream = stream            # file-like object (streaming mode)
+        self.compress_workers = compress_workers # threads compressing streams
+        self.compress_pool = None       # thread pool (while closing)
+        self.object_streams = False     # pack objects in object streams
+        self.obj_held = None            # object being written (obj. streams)
+        self.objstm_pending = []        # objects for the next object stream
+        self.objstm_index = {}          # packed objects: (stream, index)
         self.pages = {}                 # array containing pages and metadata
         self.state = 0                  # current document state
         self.fonts = {}                 # array of used fonts
         self.font_files = {}            # array of font files
+        self.encoded_texts = {}         # escaped UTF-16BE of TTF font texts
         self.diffs = {}                 # array of encoding differences
         self.images = {}                # array of used images
+        self.stamps = []                # array of stamps (form xobjects)
+        self.current_stamp = None       # stamp being recorded
+        self.nb_aliases = ()            # page count alias (as output)
         self.page_links = {}            # array of links in pages
         self.links = {}                 # array of internal links
         self.in_footer = 0              # flag set when processing footer
@@ -96,7 +329,7 @@ class FPDF(object):
             'times': 'Times-Roman', 'timesB': 'Times-Bold',
             'timesI': 'Times-Italic', 'timesBI': 'Times-BoldItalic',
             'symbol': 'Symbol', 'zapfdingbats': 'ZapfDingbats'}
-        self.core_fonts_encoding = "latin-1"
+        self.set_doc_option("core_fonts_encoding", "latin-1")
         # Scale factor
         if unit == "pt":
             self.k = 1
@@ -142,6 +375,10 @@ class FPDF(object):
         self.set_display_mode('fullwidth')
         # Enable compression
         self.set_compression(1)
+        # Numbers in operators: 2 decimals
+        self.set_precision(2)
+        # No string width cache
+        self.set_width_cache(0)
         # Set default PDF version number
         self.pdf_version = '1.3'
 
@@ -210,9 +447,53 @@ class FPDF(object):
         else:
             self.error('Incorrect layout display mode: '+layout)
 
-    def set_compression(self, compress):
-        "Set page compression"
+    def set_compression(self, compress, level=-1, policy=None):
+        """Set page compression
+
+        level is the zlib compression level, from 1 (fastest) to 9 (smallest
+        output), -1 for zlib's default. A CompressionPolicy can be given
+        instead to choose the level for each kind of stream."""
         self.compress=compress
+        self.compression=policy or CompressionPolicy(level)
+
+    def set_precision(self, digits=2, trim=False):
+        """Set the number of decimals of coordinates in page contents
+
+        If trim is true, trailing zeros are removed (smaller output)."""
+        if digits < 0:
+            self.error('Incorrect precision: ' + str(digits))
+        fmt = '%%.%df' % digits
+        self.ops = {}
+        for name, op in OPERATORS.items():
+            op = op.replace('%.2f', fmt)
+            self.ops[name] = trim and TrimmedFormat(op) or op
+
+    def set_width_cache(self, size=1024):
+        """Cache the width of the last measured strings (0 disables cache)
+
+        Used by get_string_width, and by cell to align, link or underline
+        text (multi_cell and write don't use it). Widths are kept by font,
+        stretching and text (any font size), the least recently used ones
+        are discarded when size is exceeded. Hits and misses are counted in
+        width_cache_hits/misses."""
+        if size and OrderedDict is None:
+            self.error('String width cache requires Python 2.7 or later')
+        self.width_cache = OrderedDict() if size else None
+        self.width_cache_size = size
+        self.width_cache_hits = 0
+        self.width_cache_misses = 0
+
+    def set_object_streams(self, enabled=True):
+        """Pack objects in compressed object streams (PDF 1.5)
+
+        Objects without stream data (pages, font descriptors, annotations,
+        etc.) are stored in object streams and the cross-reference table is
+        written as a compressed cross-reference stream."""
+        if self.state == 3:
+            self.error('Document already closed')
+        self.object_streams = enabled
+        if enabled and self.pdf_version < '1.5':
+            self.pdf_version = '1.5'
 
     def set_title(self, title):
         "Title of document"
@@ -241,9 +522,43 @@ class FPDF(object):
         else:
             self.error("Unknown document option \"%s\"" % str(opt))
 
+    @property
+    def core_fonts_encoding(self):
+        "Encoding of unicode text in standard fonts (see set_doc_option)"
+        return self._core_fonts_encoding
+
+    @core_fonts_encoding.setter
+    def core_fonts_encoding(self, value):
+        # look up the codec once (unknown encodings fail here, not
+        # on the first text output)
+        encoder = None
+        if value:
+            try:
+                encoder = codecs.getencoder(value)
+            except LookupError:
+                self.error("Unknown core fonts encoding \"%s\"" % str(value))
+        self._core_fonts_encoding = value
+        self.core_fonts_encoder = encoder
+        # ASCII text is left as is if the encoding is ASCII compatible
+        ascii = ''.join(map(chr, range(128)))
+        self.core_fonts_ascii = bool(encoder) and hasattr(ascii, 'isascii') \
+            and encoder(ascii)[0] == ascii.encode("latin-1")
+
     def alias_nb_pages(self, alias='{nb}'):
-        "Define an alias for total number of pages"
+        """Define an alias for total number of pages
+
+        The alias is replaced in text output by cell, text, write and
+        multi_cell (positions are recorded when output), and in content
+        already output when this is called (scanned once, here)."""
+        if self.stream:
+            self.error("alias_nb_pages is not supported in streaming mode")
         self.str_alias_nb_pages=alias
+        # alias in fonts using subsets (unicode) and in non-subset fonts
+        self.nb_aliases=(UTF8ToUTF16BE(alias, False), alias)
+        # content output before this call
+        for page in list(self.pages.values()) + self.stamps:
+            page["nb"] = [i for i, chunk in enumerate(page["content"])
+                          if self._has_alias_nb_pages(chunk)]
         return alias
 
     def error(self, msg):
@@ -266,13 +581,22 @@ class FPDF(object):
         self.in_footer=0
         #close page
         self._endpage()
-        #close document
-        self._enddoc()
+        #close document (compressing streams in worker threads if enabled)
+        if self.compress_workers > 1:
+            self.compress_pool = ThreadPool(self.compress_workers)
+        try:
+            self._enddoc()
+        finally:
+            if self.compress_pool:
+                self.compress_pool.terminate()
+                self.compress_pool = None
 
     def add_page(self, orientation = '', format = '', same = False):
         "Start a new page, if same page format will be same as previous"
         if(self.state==0):
             self.open()
+        if self.current_stamp is not None:
+            self.error('Cannot add a page while recording a stamp')
         family=self.font_family
         if self.underline:
             style = self.font_style + 'U'
@@ -298,35 +622,30 @@ class FPDF(object):
         self._out('2 J')
         #Set line width
         self.line_width=lw
-        self._out(sprintf('%.2f w',lw*self.k))
+        self._setgstate('w', self.ops['w'] % (lw*self.k))
         #Set font
         if(family):
             self.set_font(family,style,size)
-        #Set colors
+        #Set colors (only if not the default ones)
         self.draw_color=dc
-        if(dc!='0 G'):
-            self._out(dc)
+        self._setgstate('RG', dc)
         self.fill_color=fc
-        if(fc!='0 g'):
-            self._out(fc)
+        self._setgstate('rg', fc)
         self.text_color=tc
         self.color_flag=cf
         #Page header
         self.header()
         #Restore line width
-        if(self.line_width!=lw):
-            self.line_width=lw
-            self._out(sprintf('%.2f w',lw*self.k))
+        self.line_width=lw
+        self._setgstate('w', self.ops['w'] % (lw*self.k))
         #Restore font
         if(family):
             self.set_font(family,style,size)
         #Restore colors
-        if(self.draw_color!=dc):
-            self.draw_color=dc
-            self._out(dc)
-        if(self.fill_color!=fc):
-            self.fill_color=fc
-            self._out(fc)
+        self.draw_color=dc
+        self._setgstate('RG', dc)
+        self.fill_color=fc
+        self._setgstate('rg', fc)
         self.text_color=tc
         self.color_flag=cf
         #Restore stretching
@@ -352,7 +671,7 @@ class FPDF(object):
         else:
             self.draw_color=sprintf('%.3f %.3f %.3f RG',r/255.0,g/255.0,b/255.0)
         if(self.page>0):
-            self._out(self.draw_color)
+            self._setgstate('RG', self.draw_color)
 
     def set_fill_color(self,r,g=-1,b=-1):
         "Set color for all filling operations"
@@ -362,7 +681,7 @@ class FPDF(object):
             self.fill_color=sprintf('%.3f %.3f %.3f rg',r/255.0,g/255.0,b/255.0)
         self.color_flag=(self.fill_color!=self.text_color)
         if(self.page>0):
-            self._out(self.fill_color)
+            self._setgstate('rg', self.fill_color)
 
     def set_text_color(self, r,g=-1,b=-1):
         "Set color for text"
@@ -376,14 +695,22 @@ class FPDF(object):
         "Get width of a string in the current font"
         # normalized is parameter for internal use
         s = s if normalized else self.normalize_text(s)
-        cw=self.current_font['cw']
+        cache = self.width_cache
+        if cache is not None:
+            key = (self.current_font['i'], self.font_stretching, s)
+            w = cache.pop(key, None)
+            if w is not None:
+                cache[key] = w          # most recently used
+                self.width_cache_hits += 1
+                return w * self.font_size / 1000.0
+            self.width_cache_misses += 1
         w=0
-        l=len(s)
         if self.unifontsubset:
+            cw=self.current_font['cw']
             for char in s:
                 char = ord(char)
                 if len(cw) > char:
-                    w += cw[char] # ord(cw[2*char])<<8 + ord(cw[2*char+1])
+                    w += cw[char] or self.current_font['missingwidth']
                 #elif (char>0 and char<128 and isset($cw[chr($char)])) { $w += $cw[chr($char)]; }
                 elif (self.current_font['desc']['MissingWidth']) :
                     w += self.current_font['desc']['MissingWidth']
@@ -391,29 +718,34 @@ class FPDF(object):
                 else:
                     w += 500
         else:
-            for i in range(0, l):
-                w += cw.get(s[i],0)
+            w = sum(self._char_widths(s))
         if self.font_stretching != 100:
             w = w * self.font_stretching / 100.0
+        if cache is not None:
+            cache[key] = w
+            if len(cache) > self.width_cache_size:
+                cache.popitem(last=False)
         return w * self.font_size / 1000.0
 
     def set_line_width(self, width):
         "Set line width"
         self.line_width=width
         if(self.page>0):
-            self._out(sprintf('%.2f w',width*self.k))
+            self._setgstate('w', self.ops['w'] % (width*self.k))
 
     @check_page
     def line(self, x1,y1,x2,y2):
         "Draw a line"
-        self._out(sprintf('%.2f %.2f m %.2f %.2f l S',x1*self.k,(self.h-y1)*self.k,x2*self.k,(self.h-y2)*self.k))
+        k=self.k
+        hk=self.h_pt
+        self._out(self.ops['line'] % (x1*k,hk-y1*k,x2*k,hk-y2*k))
 
     def _set_dash(self, dash_length=False, space_length=False):
         if(dash_length and space_length):
             s = sprintf('[%.3f %.3f] 0 d', dash_length*self.k, space_length*self.k)
         else:
             s = '[] 0 d'
-        self._out(s)
+        self._setgstate('d', s)
 
     @check_page
     def dashed_line(self, x1,y1,x2,y2, dash_length=1, space_length=1):
@@ -433,7 +765,9 @@ class FPDF(object):
             op='B'
         else:
             op='S'
-        self._out(sprintf('%.2f %.2f %.2f %.2f re %s',x*self.k,(self.h-y)*self.k,w*self.k,-h*self.k,op))
+        k=self.k
+        hk=self.h_pt
+        self._out(self.ops['re'] % (x*k,hk-y*k,w*k,-h*k,op))
 
     @check_page
     def ellipse(self, x,y,w,h,style=''):
@@ -453,23 +787,25 @@ class FPDF(object):
         lx = 4.0/3.0*(math.sqrt(2)-1)*rx
         ly = 4.0/3.0*(math.sqrt(2)-1)*ry
 
-        self._out(sprintf('%.2f %.2f m %.2f %.2f %.2f %.2f %.2f %.2f c',
-            (cx+rx)*self.k, (self.h-cy)*self.k,
-            (cx+rx)*self.k, (self.h-(cy-ly))*self.k,
-            (cx+lx)*self.k, (self.h-(cy-ry))*self.k,
-            cx*self.k, (self.h-(cy-ry))*self.k))
-        self._out(sprintf('%.2f %.2f %.2f %.2f %.2f %.2f c',
-            (cx-lx)*self.k, (self.h-(cy-ry))*self.k,
-            (cx-rx)*self.k, (self.h-(cy-ly))*self.k,
-            (cx-rx)*self.k, (self.h-cy)*self.k))
-        self._out(sprintf('%.2f %.2f %.2f %.2f %.2f %.2f c',
-            (cx-rx)*self.k, (self.h-(cy+ly))*self.k,
-            (cx-lx)*self.k, (self.h-(cy+ry))*self.k,
-            cx*self.k, (self.h-(cy+ry))*self.k))
-        self._out(sprintf('%.2f %.2f %.2f %.2f %.2f %.2f c %s',
-            (cx+lx)*self.k, (self.h-(cy+ry))*self.k,
-            (cx+rx)*self.k, (self.h-(cy+ly))*self.k,
-            (cx+rx)*self.k, (self.h-cy)*self.k,
+        k = self.k
+        hk = self.h_pt
+        self._out(self.ops['m c'] % (
+            (cx+rx)*k, hk-cy*k,
+            (cx+rx)*k, hk-(cy-ly)*k,
+            (cx+lx)*k, hk-(cy-ry)*k,
+            cx*k, hk-(cy-ry)*k))
+        self._out(self.ops['c'] % (
+            (cx-lx)*k, hk-(cy-ry)*k,
+            (cx-rx)*k, hk-(cy-ly)*k,
+            (cx-rx)*k, hk-cy*k))
+        self._out(self.ops['c'] % (
+            (cx-rx)*k, hk-(cy+ly)*k,
+            (cx-lx)*k, hk-(cy+ry)*k,
+            cx*k, hk-(cy+ry)*k))
+        self._out(self.ops['c op'] % (
+            (cx+lx)*k, hk-(cy+ry)*k,
+            (cx+rx)*k, hk-(cy+ly)*k,
+            (cx+rx)*k, hk-cy*k,
             op))
 
     def add_font(self, family, style='', fname='', uni=False):
@@ -487,73 +823,25 @@ class FPDF(object):
             # Font already added!
             return
         if (uni):
-            global SYSTEM_TTFONTS, FPDF_CACHE_MODE, FPDF_CACHE_DIR
-            if os.path.exists(fname):
-                ttffilename = fname
-            elif (FPDF_FONT_DIR and
-                os.path.exists(os.path.join(FPDF_FONT_DIR, fname))):
-                ttffilename = os.path.join(FPDF_FONT_DIR, fname)
-            elif (SYSTEM_TTFONTS and
-                os.path.exists(os.path.join(SYSTEM_TTFONTS, fname))):
-                ttffilename = os.path.join(SYSTEM_TTFONTS, fname)
-            else:
-                raise RuntimeError("TTF Font file not found: %s" % fname)
-            name = ''
-            if FPDF_CACHE_MODE == 0:
-                unifilename = os.path.splitext(ttffilename)[0] + '.pkl'
-            elif FPDF_CACHE_MODE == 2:
-                unifilename = os.path.join(FPDF_CACHE_DIR, \
-                    hashpath(ttffilename) + ".pkl")
-            else:
-                unifilename = None
-            font_dict = load_cache(unifilename)
-            if font_dict is None:
-                ttf = TTFontFile()
-                ttf.getMetrics(ttffilename)
-                desc = {
-                    'Ascent': int(round(ttf.ascent, 0)),
-                    'Descent': int(round(ttf.descent, 0)),
-                    'CapHeight': int(round(ttf.capHeight, 0)),
-                    'Flags': ttf.flags,
-                    'FontBBox': "[%s %s %s %s]" % (
-                        int(round(ttf.bbox[0], 0)),
-                        int(round(ttf.bbox[1], 0)),
-                        int(round(ttf.bbox[2], 0)),
-                        int(round(ttf.bbox[3], 0))),
-                    'ItalicAngle': int(ttf.italicAngle),
-                    'StemV': int(round(ttf.stemV, 0)),
-                    'MissingWidth': int(round(ttf.defaultWidth, 0)),
-                    }
-                # Generate metrics .pkl file
-                font_dict = {
-                    'name': re.sub('[ ()]', '', ttf.fullName),
-                    'type': 'TTF',
-                    'desc': desc,
-                    'up': round(ttf.underlinePosition),
-                    'ut': round(ttf.underlineThickness),
-                    'ttffile': ttffilename,
-                    'fontkey': fontkey,
-                    'originalsize': os.stat(ttffilename).st_size,
-                    'cw': ttf.charWidths,
-                    }
-                if unifilename:
-                    try:
-                        with open(unifilename, "wb") as fh:
-                            pickle.dump(font_dict, fh)
-                    except IOError:
-                        if not exception().errno == errno.EACCES:
-                            raise  # Not a permission error.
-                del ttf
+            ttffilename = find_ttfont(fname)
+            unifilename = ttfont_cache_file(ttffilename)
+            font_dict = load_ttfont(ttffilename, fontkey)
+            # used characters (code points) as a set: its size is bounded
+            # by the glyphs of the font, not by the length of the document
             if hasattr(self,'str_alias_nb_pages'):
-                sbarr = list(range(0,57))   # include numbers in the subset!
+                sbarr = set(range(0,57))    # include numbers in the subset!
             else:
-                sbarr = list(range(0,32))
+                sbarr = set(range(0,32))
             self.fonts[fontkey] = {
                 'i': len(self.fonts)+1, 'type': font_dict['type'],
                 'name': font_dict['name'], 'desc': font_dict['desc'],
                 'up': font_dict['up'], 'ut': font_dict['ut'],
                 'cw': font_dict['cw'],
-                'ttffile': font_dict['ttffile'], 'fontkey': fontkey,
+                # width of characters not in the font (0 in cw)
+                'missingwidth': font_dict.get('missingwidth', 0),
+                # components of composite glyphs (subset closure)
+                'composites': font_dict.get('composites'),
+                'ttffile': ttffilename, 'fontkey': fontkey,
                 'subset': sbarr, 'unifilename': unifilename,
                 }
             self.font_files[fontkey] = {'length1': font_dict['originalsize'],
@@ -564,6 +852,7 @@ class FPDF(object):
                 font_dict = pickle.load(fontfile)
             self.fonts[fontkey] = {'i': len(self.fonts)+1}
             self.fonts[fontkey].update(font_dict)
+            self.fonts[fontkey]['widths'] = char_widths(font_dict['cw'])
             diff = font_dict.get('diff')
             if (diff):
                 #Search existing encodings
@@ -588,6 +877,31 @@ class FPDF(object):
 
     def set_font(self, family,style='',size=0):
         "Select a font; size given in points"
+        family, style, self.underline, fontkey = self._findfont(family, style)
+        if(size==0):
+            size=self.font_size_pt
+        #Test if font is already selected
+        if(self.font_family==family and self.font_style==style and self.font_size_pt==size):
+            return
+        #Test if used for the first time
+        if fontkey not in self.fonts:
+            #One of the standard fonts
+            i=len(self.fonts)+1
+            self.fonts[fontkey]={'i':i,'type':'core','name':self.core_fonts[fontkey],'up':-100,'ut':50,'cw':fpdf_charwidths[fontkey],
+                                 'widths':char_widths(fpdf_charwidths[fontkey])}
+        #Select it
+        self.font_family=family
+        self.font_style=style
+        self.font_size_pt=size
+        self.font_size=size/self.k
+        self.current_font=self.fonts[fontkey]
+        self.unifontsubset = (self.fonts[fontkey]['type'] == 'TTF')
+        if(self.page>0):
+            self._setgstate('Tf', sprintf('BT /F%d %.2f Tf ET',self.current_font['i'],self.font_size_pt))
+
+    def _findfont(self, family, style):
+        # Resolve a family and style as given to set_font: returns (family,
+        # style, underline, fontkey), loading metrics of core fonts if needed
         family=family.lower()
         if(family==''):
             family=self.font_family
@@ -597,18 +911,12 @@ class FPDF(object):
             style=''
         style=style.upper()
         if('U' in style):
-            self.underline=1
+            underline=1
             style=style.replace('U','')
         else:
-            self.underline=0
+            underline=0
         if(style=='IB'):
             style='BI'
-        if(size==0):
-            size=self.font_size_pt
-        #Test if font is already selected
-        if(self.font_family==family and self.font_style==style and self.font_size_pt==size):
-            return
-        #Test if used for the first time
         fontkey=family+style
         if fontkey not in self.fonts:
             #Check if one of the standard fonts
@@ -622,19 +930,9 @@ class FPDF(object):
                         exec(compile(file.read(), name+'.font', 'exec'))
                     if fontkey not in fpdf_charwidths:
                         self.error('Could not include font metric file for'+fontkey)
-                i=len(self.fonts)+1
-                self.fonts[fontkey]={'i':i,'type':'core','name':self.core_fonts[fontkey],'up':-100,'ut':50,'cw':fpdf_charwidths[fontkey]}
             else:
                 self.error('Undefined font: '+family+' '+style)
-        #Select it
-        self.font_family=family
-        self.font_style=style
-        self.font_size_pt=size
-        self.font_size=size/self.k
-        self.current_font=self.fonts[fontkey]
-        self.unifontsubset = (self.fonts[fontkey]['type'] == 'TTF')
-        if(self.page>0):
-            self._out(sprintf('BT /F%d %.2f Tf ET',self.current_font['i'],self.font_size_pt))
+        return family, style, underline, fontkey
 
     def set_font_size(self, size):
         "Set font size in points"
@@ -643,7 +941,7 @@ class FPDF(object):
         self.font_size_pt=size
         self.font_size=size/self.k
         if(self.page>0):
-            self._out(sprintf('BT /F%d %.2f Tf ET',self.current_font['i'],self.font_size_pt))
+            self._setgstate('Tf', sprintf('BT /F%d %.2f Tf ET',self.current_font['i'],self.font_size_pt))
 
     def set_stretching(self, factor):
         "Set from stretch factor percents (default: 100.0)"
@@ -651,7 +949,7 @@ class FPDF(object):
             return
         self.font_stretching = factor
         if (self.page > 0):
-            self._out(sprintf('BT %.2f Tz ET', self.font_stretching))
+            self._setgstate('Tz', sprintf('BT %.2f Tz ET', self.font_stretching))
 
     def add_link(self):
         "Create a new internal link"
@@ -669,6 +967,8 @@ class FPDF(object):
 
     def link(self, x,y,w,h,link):
         "Put a link on the page"
+        if self.current_stamp is not None:
+            return                      # links are not part of stamps
         if not self.page in self.page_links:
             self.page_links[self.page] = []
         self.page_links[self.page] += [(x*self.k,self.h_pt-y*self.k,w*self.k,h*self.k,link),]
@@ -678,17 +978,17 @@ class FPDF(object):
         "Output a string"
         txt = self.normalize_text(txt)
         if (self.unifontsubset):
-            txt2 = self._escape(UTF8ToUTF16BE(txt, False))
-            for uni in UTF8StringToArray(txt):
-                self.current_font['subset'].append(uni)
+            txt2 = self._utf16(txt)
+            self.current_font['subset'].update(map(ord, txt))
         else:
             txt2 = self._escape(txt)
-        s=sprintf('BT %.2f %.2f Td (%s) Tj ET',x*self.k,(self.h-y)*self.k, txt2)
+        s=self.ops['Td'] % (x*self.k,self.h_pt-y*self.k) + ' (' + txt2 + ') Tj ET'
         if(self.underline and txt!=''):
             s+=' '+self._dounderline(x,y,txt)
         if(self.color_flag):
             s='q '+self.text_color+' '+s+' Q'
         self._out(s)
+        self._mark_alias_nb_pages(txt)
 
     @check_page
     def rotate(self, angle, x=None, y=None):
@@ -696,17 +996,21 @@ class FPDF(object):
             x = self.x
         if y is None:
             y = self.y;
+        gstates = self.pages[self.page]["gstate"]
         if self.angle!=0:
             self._out('Q')
+            if len(gstates) > 1:
+                gstates.pop()
         self.angle = angle
         if angle!=0:
             angle *= math.pi/180;
             c = math.cos(angle);
             s = math.sin(angle);
             cx = x*self.k;
-            cy = (self.h-y)*self.k
+            cy = self.h_pt-y*self.k
             s = sprintf('q %.5F %.5F %.5F %.5F %.2F %.2F cm 1 0 0 1 %.2F %.2F cm',c,s,-s,c,cx,cy,-cx,-cy)
             self._out(s)
+            gstates.append(dict(gstates[-1]))
 
     def accept_page_break(self):
         "Accept automatic page break or not"
@@ -728,9 +1032,11 @@ class FPDF(object):
             self.x=x
             if(ws>0):
                 self.ws=ws
-                self._out(sprintf('%.3f Tw',ws*k))
+                self._out(self.ops['Tw'] % (ws*k))
         if(w==0):
             w=self.w-self.r_margin-self.x
+        ops=self.ops
+        hk=self.h_pt
         s=''
         if(fill==1 or border==1):
             if(fill==1):
@@ -740,18 +1046,18 @@ class FPDF(object):
                     op='f'
             else:
                 op='S'
-            s=sprintf('%.2f %.2f %.2f %.2f re %s ',self.x*k,(self.h-self.y)*k,w*k,-h*k,op)
+            s=ops['re'] % (self.x*k,hk-self.y*k,w*k,-h*k,op)+' '
         if(isinstance(border,basestring)):
             x=self.x
             y=self.y
             if('L' in border):
-                s+=sprintf('%.2f %.2f m %.2f %.2f l S ',x*k,(self.h-y)*k,x*k,(self.h-(y+h))*k)
+                s+=ops['line'] % (x*k,hk-y*k,x*k,hk-(y+h)*k)+' '
             if('T' in border):
-                s+=sprintf('%.2f %.2f m %.2f %.2f l S ',x*k,(self.h-y)*k,(x+w)*k,(self.h-y)*k)
+                s+=ops['line'] % (x*k,hk-y*k,(x+w)*k,hk-y*k)+' '
             if('R' in border):
-                s+=sprintf('%.2f %.2f m %.2f %.2f l S ',(x+w)*k,(self.h-y)*k,(x+w)*k,(self.h-(y+h))*k)
+                s+=ops['line'] % ((x+w)*k,hk-y*k,(x+w)*k,hk-(y+h)*k)+' '
             if('B' in border):
-                s+=sprintf('%.2f %.2f m %.2f %.2f l S ',x*k,(self.h-(y+h))*k,(x+w)*k,(self.h-(y+h))*k)
+                s+=ops['line'] % (x*k,hk-(y+h)*k,(x+w)*k,hk-(y+h)*k)+' '
         if(txt!=''):
             if(align=='R'):
                 dx=w-self.c_margin-self.get_string_width(txt, True)
@@ -764,29 +1070,21 @@ class FPDF(object):
 
             # If multibyte, Tw has no effect - do word spacing using an adjustment before each space
             if (self.ws and self.unifontsubset):
-                for uni in UTF8StringToArray(txt):
-                    self.current_font['subset'].append(uni)
-                space = self._escape(UTF8ToUTF16BE(' ', False))
-                s += sprintf('BT 0 Tw %.2F %.2F Td [',(self.x + dx) * k,(self.h - (self.y + 0.5*h+ 0.3 * self.font_size)) * k)
-                t = txt.split(' ')
-                numt = len(t)
-                for i in range(numt):
-                    tx = t[i]
-                    tx = '(' + self._escape(UTF8ToUTF16BE(tx, False)) + ')'
-                    s += sprintf('%s ', tx);
-                    if ((i+1)<numt):
-                        adj = -(self.ws * self.k) * 1000 / self.font_size_pt
-                        s += sprintf('%d(%s) ', adj, space)
+                self.current_font['subset'].update(map(ord, txt))
+                space = self._utf16(' ')
+                s += ops['Tw Td'] % ((self.x + dx) * k,hk-(self.y + 0.5*h+ 0.3 * self.font_size)*k)
+                adj = -(self.ws * self.k) * 1000 / self.font_size_pt
+                s += ('%d(%s) ' % (adj, space)).join(
+                    ['(' + self._utf16(tx) + ') ' for tx in txt.split(' ')])
                 s += '] TJ'
                 s += ' ET'
             else:
                 if (self.unifontsubset):
-                    txt2 = self._escape(UTF8ToUTF16BE(txt, False))
-                    for uni in UTF8StringToArray(txt):
-                        self.current_font['subset'].append(uni)
+                    txt2 = self._utf16(txt)
+                    self.current_font['subset'].update(map(ord, txt))
                 else:
                     txt2 = self._escape(txt)
-                s += sprintf('BT %.2f %.2f Td (%s) Tj ET',(self.x+dx)*k,(self.h-(self.y+.5*h+.3*self.font_size))*k,txt2)
+                s += ops['Td'] % ((self.x+dx)*k,hk-(self.y+.5*h+.3*self.font_size)*k) + ' (' + txt2 + ') Tj ET'
 
             if(self.underline):
                 s+=' '+self._dounderline(self.x+dx,self.y+.5*h+.3*self.font_size,txt)
@@ -796,6 +1094,7 @@ class FPDF(object):
                 self.link(self.x+dx,self.y+.5*h-.5*self.font_size,self.get_string_width(txt, True),self.font_size,link)
         if(s):
             self._out(s)
+            self._mark_alias_nb_pages(txt)
         self.lasth=h
         if(ln>0):
             #Go to next line
@@ -810,7 +1109,6 @@ class FPDF(object):
         "Output text with automatic or explicit line breaks"
         txt = self.normalize_text(txt)
         ret = [] # if split_only = True, returns splited text cells
-        cw=self.current_font['cw']
         if(w==0):
             w=self.w-self.r_margin-self.x
         wmax=(w-2*self.c_margin)*1000.0/self.font_size
@@ -834,158 +1132,107 @@ class FPDF(object):
                     b=b2+'T'
                 else:
                     b=b2
-        sep=-1
-        i=0
-        j=0
-        l=0
-        ns=0
         nl=1
-        while(i<nb):
-            #Get next character
-            c=s[i]
-            if(c=="\n"):
-                #Explicit line break
-                if(self.ws>0):
+        for brk, j, i, ns, ls in self._splitlines(s, nb, wmax):
+            if(brk=='space' and align=='J'):
+                #Automatic line break at a space: justify
+                if ns>1:
+                    self.ws=(wmax-ls)/1000.0*self.font_size/(ns-1)
+                else:
                     self.ws=0
-                    if not split_only:
-                        self._out('0 Tw')
                 if not split_only:
-                    self.cell(w,h,substr(s,j,i-j),b,2,align,fill)
-                else:
-                    ret.append(substr(s,j,i-j))
-                i+=1
-                sep=-1
-                j=i
-                l=0
-                ns=0
-                nl+=1
-                if(border and nl==2):
-                    b=b2
-                continue
-            if(c==' '):
-                sep=i
-                ls=l
-                ns+=1
-            if self.unifontsubset:
-                l += self.get_string_width(c, True) / self.font_size*1000.0
-            else:
-                l += cw.get(c,0)
-            if(l>wmax):
-                #Automatic line break
-                if(sep==-1):
-                    if(i==j):
-                        i+=1
-                    if(self.ws>0):
-                        self.ws=0
-                        if not split_only:
-                            self._out('0 Tw')
-                    if not split_only:
-                        self.cell(w,h,substr(s,j,i-j),b,2,align,fill)
-                    else:
-                        ret.append(substr(s,j,i-j))
-                else:
-                    if(align=='J'):
-                        if ns>1:
-                            self.ws=(wmax-ls)/1000.0*self.font_size/(ns-1)
-                        else:
-                            self.ws=0
-                        if not split_only:
-                            self._out(sprintf('%.3f Tw',self.ws*self.k))
-                    if not split_only:
-                        self.cell(w,h,substr(s,j,sep-j),b,2,align,fill)
-                    else:
-                        ret.append(substr(s,j,sep-j))
-                    i=sep+1
-                sep=-1
-                j=i
-                l=0
-                ns=0
-                nl+=1
-                if(border and nl==2):
-                    b=b2
-            else:
-                i+=1
-        #Last chunk
-        if(self.ws>0):
-            self.ws=0
+                    self._out(self.ops['Tw'] % (self.ws*self.k))
+            elif(brk!='space' and self.ws>0):
+                self.ws=0
+                if not split_only:
+                    self._out('0 Tw')
+            if(brk is None and border and 'B' in border):
+                #Last chunk
+                b+='B'
             if not split_only:
-                self._out('0 Tw')
-        if(border and 'B' in border):
-            b+='B'
+                self.cell(w,h,substr(s,j,i-j),b,2,align,fill)
+            else:
+                ret.append(substr(s,j,i-j))
+            nl+=1
+            if(border and nl==2):
+                b=b2
         if not split_only:
-            self.cell(w,h,substr(s,j,i-j),b,2,align,fill)
             self.x=self.l_margin
+        return ret
+
+    def measure_lines(self, texts, w, family=None, style='', size=0, count_only=False):
+        "Break texts in lines as multi_cell would, without output"
+        if family is None:
+            if not self.font_family:
+                self.error('No font selected')
+            font=self.current_font
         else:
-            ret.append(substr(s,j,i-j))
+            fontkey=self._findfont(family, style)[3]
+            if fontkey in self.fonts:
+                font=self.fonts[fontkey]
+            else:
+                #Core font not used in the document (yet)
+                font={'type':'core','widths':char_widths(fpdf_charwidths[fontkey])}
+        if(size==0):
+            #Current font size (the default one before any set_font)
+            font_size=self.font_size_pt/self.k
+        else:
+            font_size=size/self.k
+        if(w==0):
+            #Up to the right margin (from the left margin before any page)
+            w=self.w-self.r_margin-getattr(self, 'x', self.l_margin)
+        wmax=(w-2*self.c_margin)*1000.0/font_size
+        #Measure with this font (before any set_font too)
+        saved=(getattr(self, 'current_font', None),
+               getattr(self, 'unifontsubset', False),
+               getattr(self, 'font_size', font_size))
+        self.current_font=font
+        self.unifontsubset=(font['type']=='TTF')
+        self.font_size=font_size
+        try:
+            ret=[]
+            for txt in texts:
+                s=self.normalize_text(txt).replace("\r",'')
+                nb=len(s)
+                if(nb>0 and s[nb-1]=="\n"):
+                    nb-=1
+                lines=self._splitlines(s, nb, wmax)
+                if count_only:
+                    ret.append(len(list(lines)))
+                else:
+                    ret.append([substr(s,j,i-j) for brk, j, i, ns, l in lines])
+        finally:
+            self.current_font, self.unifontsubset, self.font_size = saved
         return ret
 
     @check_page
     def write(self, h, txt='', link=''):
         "Output text in flowing mode"
         txt = self.normalize_text(txt)
-        cw=self.current_font['cw']
         w=self.w-self.r_margin-self.x
         wmax=(w-2*self.c_margin)*1000.0/self.font_size
         s=txt.replace("\r",'')
         nb=len(s)
-        sep=-1
-        i=0
-        j=0
-        l=0
+        #Following lines start at the left margin
+        wnext=((self.w-self.r_margin-self.l_margin)-2*self.c_margin)*1000.0/self.font_size
         nl=1
-        while(i<nb):
-            #Get next character
-            c=s[i]
-            if(c=="\n"):
-                #Explicit line break
-                self.cell(w,h,substr(s,j,i-j),0,2,'',0,link)
-                i+=1
-                sep=-1
-                j=i
-                l=0
-                if(nl==1):
-                    self.x=self.l_margin
-                    w=self.w-self.r_margin-self.x
-                    wmax=(w-2*self.c_margin)*1000.0/self.font_size
-                nl+=1
-                continue
-            if(c==' '):
-                sep=i
-            if self.unifontsubset:
-                l += self.get_string_width(c, True) / self.font_size*1000.0
+        for brk, j, i, ns, l in self._splitlines(s, nb, wmax, wnext,
+                                                 self.x>self.l_margin):
+            if(brk=='move'):
+                #Move to next line
+                self.x=self.l_margin
+                self.y+=h
+                w=self.w-self.r_margin-self.x
+            elif(brk is None):
+                #Last chunk
+                if(i!=j):
+                    self.cell(l/1000.0*self.font_size,h,substr(s,j),0,0,'',0,link)
             else:
-                l += cw.get(c,0)
-            if(l>wmax):
-                #Automatic line break
-                if(sep==-1):
-                    if(self.x>self.l_margin):
-                        #Move to next line
-                        self.x=self.l_margin
-                        self.y+=h
-                        w=self.w-self.r_margin-self.x
-                        wmax=(w-2*self.c_margin)*1000.0/self.font_size
-                        i+=1
-                        nl+=1
-                        continue
-                    if(i==j):
-                        i+=1
-                    self.cell(w,h,substr(s,j,i-j),0,2,'',0,link)
-                else:
-                    self.cell(w,h,substr(s,j,sep-j),0,2,'',0,link)
-                    i=sep+1
-                sep=-1
-                j=i
-                l=0
+                self.cell(w,h,substr(s,j,i-j),0,2,'',0,link)
                 if(nl==1):
                     self.x=self.l_margin
                     w=self.w-self.r_margin-self.x
-                    wmax=(w-2*self.c_margin)*1000.0/self.font_size
-                nl+=1
-            else:
-                i+=1
-        #Last chunk
-        if(i!=j):
-            self.cell(l/1000.0*self.font_size,h,substr(s,j),0,0,'',0,link)
+            nl+=1
 
     @check_page
     def image(self, name, x=None, y=None, w=0,h=0,type='',link='', is_mask=False, mask_image=None):
@@ -1056,12 +1303,73 @@ class FPDF(object):
         if x is None:
             x = self.x
         if not is_mask:
-            self._out(sprintf('q %.2f 0 0 %.2f %.2f %.2f cm /I%d Do Q',w*self.k,h*self.k,x*self.k,(self.h-(y+h))*self.k,info['i']))
+            self._out(self.ops['image'] % (w*self.k,h*self.k,x*self.k,self.h_pt-(y+h)*self.k,info['i']))
         if(link):
             self.link(x,y,w,h,link)
 
         return info
 
+    @check_page
+    @contextmanager
+    def record_stamp(self):
+        """Record drawing operations in a reusable stamp (form xobject)
+
+        Operations done in the with block are not drawn on the page, use
+        place_stamp to draw the stamp (on any page)."""
+        if self.current_stamp is not None:
+            self.error('A stamp is already being recorded')
+        # graphics state is unknown: it is inherited where the stamp is drawn
+        stamp = {'i': len(self.stamps) + 1, 'w_pt': self.w_pt,
+                 'h_pt': self.h_pt, 'bbox': None, 'content': [], 'nb': [],
+                 'gstate': [{}]}
+        saved = dict((attr, getattr(self, attr)) for attr in (
+            'x', 'y', 'font_family', 'font_style', 'font_size_pt',
+            'font_size', 'current_font', 'unifontsubset', 'underline',
+            'line_width', 'draw_color', 'fill_color', 'text_color',
+            'color_flag', 'font_stretching', 'ws', 'in_footer')
+            if hasattr(self, attr))
+        page = self.pages[self.page]
+        # operations are output to the stamp, as if it was a new page
+        self.pages[self.page] = self.current_stamp = stamp
+        self.in_footer = 1              # no automatic page break
+        try:
+            self._out('2 J')
+            self._setgstate('w', self.ops['w'] % (self.line_width * self.k))
+            self._setgstate('d', '[] 0 d')
+            if self.font_family:
+                self.font_family = ''
+                self.set_font(saved['font_family'], saved['font_style'] +
+                              (saved['underline'] and 'U' or ''),
+                              saved['font_size_pt'])
+            self._setgstate('RG', self.draw_color)
+            self._setgstate('rg', self.fill_color)
+            self._setgstate('Tz', sprintf('BT %.2f Tz ET',
+                                          self.font_stretching))
+            yield stamp
+        finally:
+            self.pages[self.page] = page
+            self.current_stamp = None
+            for attr, value in saved.items():
+                setattr(self, attr, value)
+        self.stamps.append(stamp)
+
+    @check_page
+    def place_stamp(self, stamp, x=0, y=0):
+        "Draw a stamp, moved by x and y from where it was recorded"
+        # stamp content is drawn from the top of the page it was recorded on
+        dx = x * self.k
+        dy = self.h_pt - stamp['h_pt'] - y * self.k
+        # the stamp is clipped to its bounding box: it must hold the whole
+        # page (in stamp coordinates) on every page where it is placed
+        bbox = (0 - dx, 0 - dy, self.w_pt - dx, self.h_pt - dy)
+        if stamp['bbox']:
+            bbox = (min(bbox[0], stamp['bbox'][0]),
+                    min(bbox[1], stamp['bbox'][1]),
+                    max(bbox[2], stamp['bbox'][2]),
+                    max(bbox[3], stamp['bbox'][3]))
+        stamp['bbox'] = bbox
+        self._out(self.ops['stamp'] % (dx, dy, stamp['i']))
+
     @check_page
     def ln(self, h=''):
         "Line Feed; default value is last cell height"
@@ -1104,22 +1412,25 @@ class FPDF(object):
 
         By default the PDF is written to sys.stdout. If a name is given, the
         PDF is written to a new file. If dest='S' is given, the PDF data is
-        returned as a byte string."""
+        returned as a byte string.
+
+        In streaming mode (see the stream argument of the constructor) the
+        PDF is already written to the stream, so output() only finishes it."""
 
         #Finish document if necessary
         if(self.state<3):
             self.close()
+        if self.stream:
+            if name or dest:
+                self.error('Output destination not allowed in streaming mode')
+            return
         dest=dest.upper()
         if(dest==''):
             if(name==''):
                 dest='I'
             else:
                 dest='F'
-        if PY3K:
-            # manage binary data as latin1 until PEP461 or similar is implemented
-            buffer = self.buffer.encode("latin1")
-        else:
-            buffer = self.buffer
+        buffer = self.buffer
         if dest in ('I', 'D'):
             # Python < 3 writes byte data transparently without "buffer"
             stdout = getattr(sys.stdout, 'buffer', sys.stdout)
@@ -1130,7 +1441,7 @@ class FPDF(object):
                 f.write(buffer)
         elif dest=='S':
             #Return as a byte string
-            return buffer
+            return bytes(buffer)
         else:
             self.error('Incorrect output destination: '+dest)
 
@@ -1142,10 +1453,12 @@ class FPDF(object):
             if self.unifontsubset and isinstance(txt, str):
                 return txt.decode("utf-8")
             elif not self.unifontsubset and isinstance(txt, unicode):
-                return txt.encode(self.core_fonts_encoding)
+                return self.core_fonts_encoder(txt)[0]
         else:
-            if not self.unifontsubset and self.core_fonts_encoding:
-                return txt.encode(self.core_fonts_encoding).decode("latin-1")
+            if not self.unifontsubset and self.core_fonts_encoder:
+                if self.core_fonts_ascii and txt.isascii():
+                    return txt
+                return self.core_fonts_encoder(txt)[0].decode("latin-1")
         return txt
 
     def _dochecks(self):
@@ -1162,28 +1475,17 @@ class FPDF(object):
 
     def _putpages(self):
         nb = self.page
-        if hasattr(self, 'str_alias_nb_pages'):
-            # Replace number of pages in fonts using subsets (unicode)
-            alias = UTF8ToUTF16BE(self.str_alias_nb_pages, False)
-            r = UTF8ToUTF16BE(str(nb), False)
-            for n in range(1, nb + 1):
-                self.pages[n]["content"] = \
-                    self.pages[n]["content"].replace(alias, r)
-            # Now repeat for no pages in non-subset fonts
-            for n in range(1,nb + 1):
-                self.pages[n]["content"] = \
-                    self.pages[n]["content"].replace(self.str_alias_nb_pages,
-                        str(nb))
         if self.def_orientation == 'P':
             dw_pt = self.dw_pt
             dh_pt = self.dh_pt
         else:
             dw_pt = self.dh_pt
             dh_pt = self.dw_pt
-        if self.compress:
-            filter = '/Filter /FlateDecode '
-        else:
-            filter = ''
+        if not self.stream:
+            contents = (self._getpagecontent(n) for n in range(1, nb + 1))
+            level = self._compress_level('page')
+            if level is not None:
+                contents = self._compress_all(contents, level)
         for n in range(1, nb + 1):
             # Page
             self._newobj()
@@ -1219,21 +1521,13 @@ class FPDF(object):
                     "/CS /DeviceRGB>>")
             self._out('/Contents ' + str(self.n + 1) + ' 0 R>>')
             self._out('endobj')
-            # Page content
-            content = self.pages[n]["content"]
-            if self.compress:
-                # manage binary data as latin1 until PEP461 or similar is implemented
-                p = content.encode("latin1") if PY3K else content
-                p = zlib.compress(p)
+            if self.stream:
+                # Page content was already written by _endpage
+                self.n += 1
             else:
-                p = content
-            self._newobj()
-            self._out('<<' + filter + '/Length ' + str(len(p)) + '>>')
-            self._putstream(p)
-            self._out('endobj')
+                self._putpagecontent(next(contents))
         # Pages root
-        self.offsets[1] = len(self.buffer)
-        self._out('1 0 obj')
+        self._newobj(1)
         self._out('<</Type /Pages')
         kids = '/Kids ['
         for i in range(0, nb):
@@ -1244,6 +1538,77 @@ class FPDF(object):
         self._out('>>')
         self._out('endobj')
 
+    def _mark_alias_nb_pages(self, txt):
+        # Record the last chunk of page content if its text holds the alias
+        if self.nb_aliases and self.str_alias_nb_pages in txt:
+            page = self.pages[self.page]
+            page["nb"].append(len(page["content"]) - 1)
+
+    def _has_alias_nb_pages(self, chunk):
+        # Check if a chunk of page content holds the page count alias
+        for alias in self.nb_aliases:
+            if alias in chunk:
+                return True
+        return False
+
+    def _getpagecontent(self, n):
+        # Page content (chunks are joined only once, here)
+        return self._getcontent(self.pages[n])
+
+    def _getcontent(self, page):
+        # Content of a page or stamp, with alias for number of pages
+        chunks = page["content"]
+        if page["nb"]:
+            # Replace number of pages only in chunks holding the alias,
+            # in fonts using subsets (unicode) and in non-subset fonts
+            alias, alias_core = self.nb_aliases
+            r = UTF8ToUTF16BE(str(self.page), False)
+            for i in page["nb"]:
+                chunks[i] = chunks[i].replace(alias, r).replace(
+                    alias_core, str(self.page))
+        content = ''.join(chunks)
+        # manage binary data as latin1 until PEP461 or similar is implemented
+        return content.encode("latin1") if PY3K else content
+
+    def _compress_level(self, kind):
+        # Compression level for a kind of stream (None if not compressed)
+        if not self.compress and kind not in ('font', 'object'):
+            return None
+        return self.compression.get_level(kind)
+
+    def _compress(self, data, kind):
+        # Compress a stream following the policy (None if not compressed)
+        level = self._compress_level(kind)
+        if level is None:
+            return None
+        return zlib.compress(data, level)
+
+    def _compress_all(self, items, level):
+        # Compress byte strings keeping their order (using worker threads)
+        if not self.compress_pool:
+            for item in items:
+                yield zlib.compress(item, level)
+            return
+        pending = []
+        for item in items:
+            pending.append(self.compress_pool.apply_async(zlib.compress,
+                                                          (item, level)))
+            if len(pending) > 2 * self.compress_workers:
+                yield pending.pop(0).get()
+        for result in pending:
+            yield result.get()
+
+    def _putpagecontent(self, p, n=None):
+        # Page content stream (already compressed if compression is enabled)
+        if self._compress_level('page') is not None:
+            filter = '/Filter /FlateDecode '
+        else:
+            filter = ''
+        self._newobj(n)
+        self._out('<<' + filter + '/Length ' + str(len(p)) + '>>')
+        self._putstream(p)
+        self._out('endobj')
+
     def _putfonts(self):
         nf=self.n
         for diff in self.diffs:
@@ -1278,6 +1643,17 @@ class FPDF(object):
                 self._out('endobj')
         flist = [(x[1]["i"],x[0],x[1]) for x in self.fonts.items()]
         flist.sort()
+        ttfsubsets = {}
+        for idx,k,font in flist:
+            if font['type'] == 'TTF':
+                # reuse the subset of a previous document (same characters)
+                key = ttfont_subset_key(font, self._compress_level('font'))
+                subset = load_ttfont_subset(key)
+                if subset is None and self.compress_pool:
+                    # Subset and compress unicode fonts in worker threads
+                    subset = self.compress_pool.apply_async(
+                        self._getttfontsubset, (font, ))
+                ttfsubsets[k] = (key, subset)
         for idx,k,font in flist:
             #Font objects
             self.fonts[k]['n']=self.n+1
@@ -1333,15 +1709,18 @@ class FPDF(object):
                 self._out('endobj')
             elif (type == 'TTF'):
                 self.fonts[k]['n'] = self.n + 1
-                ttf = TTFontFile()
                 fontname = 'MPDFAA' + '+' + font['name']
-                subset = font['subset']
-                del subset[0]
-                ttfontstream = ttf.makeSubset(font['ttffile'], subset)
-                ttfontsize = len(ttfontstream)
-                fontstream = zlib.compress(ttfontstream)
-                codeToGlyph = ttf.codeToGlyph
-                ##del codeToGlyph[0]
+                key, subset = ttfsubsets[k]
+                if not isinstance(subset, tuple):
+                    if subset is None:
+                        subset = self._getttfontsubset(font)
+                    else:
+                        subset = subset.get()
+                    fontstream, ttfontsize, cidtogidmap, maxUni = subset
+                    subset = (fontstream, ttfontsize, cidtogidmap,
+                              self._getTTfontwidths(font, maxUni))
+                    save_ttfont_subset(key, subset)
+                fontstream, ttfontsize, cidtogidmap, widths = subset
                 # Type0 Font
                 # A composite font - a font composed of other fonts, organized hierarchically
                 self._newobj()
@@ -1364,7 +1743,7 @@ class FPDF(object):
                 self._out('/FontDescriptor ' + str(self.n + 3) + ' 0 R')
                 if (font['desc'].get('MissingWidth')):
                     self._out('/DW %d' % font['desc']['MissingWidth'])
-                self._putTTfontwidths(font, ttf.maxUni)
+                self._out(widths)
                 self._out('/CIDToGIDMap ' + str(self.n + 4) + ' 0 R')
                 self._out('>>')
                 self._out('endobj')
@@ -1419,19 +1798,10 @@ class FPDF(object):
 
                 # Embed CIDToGIDMap
                 # A specification of the mapping from CIDs to glyph indices
-                cidtogidmap = '';
-                cidtogidmap = ["\x00"] * 256*256*2
-                for cc, glyph in codeToGlyph.items():
-                    cidtogidmap[cc*2] = chr(glyph >> 8)
-                    cidtogidmap[cc*2 + 1] = chr(glyph & 0xFF)
-                cidtogidmap = ''.join(cidtogidmap)
-                if PY3K:
-                    # manage binary data as latin1 until PEP461-like function is implemented
-                    cidtogidmap = cidtogidmap.encode("latin1")
-                cidtogidmap = zlib.compress(cidtogidmap);
                 self._newobj()
                 self._out('<</Length ' + str(len(cidtogidmap)) + '')
-                self._out('/Filter /FlateDecode')
+                if self._compress_level('font') is not None:
+                    self._out('/Filter /FlateDecode')
                 self._out('>>')
                 self._putstream(cidtogidmap)
                 self._out('endobj')
@@ -1439,12 +1809,12 @@ class FPDF(object):
                 #Font file
                 self._newobj()
                 self._out('<</Length ' + str(len(fontstream)))
-                self._out('/Filter /FlateDecode')
+                if self._compress_level('font') is not None:
+                    self._out('/Filter /FlateDecode')
                 self._out('/Length1 ' + str(ttfontsize))
                 self._out('>>')
                 self._putstream(fontstream)
                 self._out('endobj')
-                del ttf
             else:
                 #Allow for additional types
                 mtd='_put'+type.lower()
@@ -1452,7 +1822,25 @@ class FPDF(object):
                     self.error('Unsupported font type: '+type)
                 self.mtd(font)
 
-    def _putTTfontwidths(self, font, maxUni):
+    def _getttfontsubset(self, font):
+        "Make the font subset, return (fontstream, size, cidtogidmap, maxUni)"
+        ttf = TTFontFile()
+        subset = sorted(font['subset'].difference([0]))
+        ttfontstream = ttf.makeSubset(font['ttffile'], subset,
+                                      font['composites'])
+        ttfontsize = len(ttfontstream)
+        fontstream = self._compress(ttfontstream, 'font') or ttfontstream
+        # glyph of each code (2 bytes, big endian), 0 for unused codes
+        cidtogidmap = bytearray(256*256*2)
+        for cc, glyph in ttf.codeToGlyph.items():
+            cidtogidmap[cc*2] = glyph >> 8
+            cidtogidmap[cc*2 + 1] = glyph & 0xFF
+        cidtogidmap = bytes(cidtogidmap)
+        cidtogidmap = self._compress(cidtogidmap, 'font') or cidtogidmap
+        return fontstream, ttfontsize, cidtogidmap, ttf.maxUni
+
+    def _getTTfontwidths(self, font, maxUni):
+        "Return the /W array (glyph widths) of the font subset"
         if font['unifilename']:
             cw127fname = os.path.splitext(font['unifilename'])[0] + '.cw127.pkl'
         else:
@@ -1477,7 +1865,7 @@ class FPDF(object):
         cwlen = maxUni + 1
 
         # for each character
-        subset = set(font['subset'])
+        subset = font['subset']
         for cid in range(startcid, cwlen):
             if cid == 128 and cw127fname and not os.path.exists(cw127fname):
                 try:
@@ -1495,7 +1883,7 @@ class FPDF(object):
                         raise  # Not a permission error.
             if cid > 255 and (cid not in subset): #
                 continue
-            width = font['cw'][cid]
+            width = font['cw'][cid] or font['missingwidth']
             if (width == 0):
                 continue
             if (width == 65535): width = 0
@@ -1550,12 +1938,9 @@ class FPDF(object):
                 w.append(' %s %s %s' % (k, k + len(ws) - 1, ws[0]))
             else:
                 w.append(' %s [ %s ]\n' % (k, ' '.join([str(int(h)) for h in ws]))) ##
-        self._out('/W [%s]' % ''.join(w))
+        return '/W [%s]' % ''.join(w)
 
     def _putimages(self):
-        filter=''
-        if self.compress:
-            filter='/Filter /FlateDecode '
         i = [(x[1]["i"],x[1]) for x in self.images.items()]
         i.sort()
         for idx,info in i:
@@ -1583,8 +1968,16 @@ class FPDF(object):
                 if(info['cs']=='DeviceCMYK'):
                     self._out('/Decode [1 0 1 0 1 0 1 0]')
             self._out('/BitsPerComponent '+str(info['bpc']))
+            data = info['data']
             if 'f' in info:
+                # already encoded (JPEG, PNG): never recompressed
                 self._out('/Filter /'+info['f'])
+            elif 'dp' not in info:
+                # raw image data
+                compressed = self._compress(data, 'image')
+                if compressed is not None:
+                    data = compressed
+                    self._out('/Filter /FlateDecode')
             if 'dp' in info:
                 self._out('/DecodeParms <<' + info['dp'] + '>>')
             if('trns' in info and isinstance(info['trns'], list)):
@@ -1594,8 +1987,8 @@ class FPDF(object):
                 self._out('/Mask ['+trns+']')
             if('smask' in info):
                 self._out('/SMask ' + str(self.n+1) + ' 0 R');
-            self._out('/Length '+str(len(info['data']))+'>>')
-            self._putstream(info['data'])
+            self._out('/Length '+str(len(data))+'>>')
+            self._putstream(data)
             self._out('endobj')
             # Soft mask
             if('smask' in info):
@@ -1605,20 +1998,41 @@ class FPDF(object):
             #Palette
             if(info['cs']=='Indexed'):
                 self._newobj()
-                filter = self.compress and '/Filter /FlateDecode ' or ''
-                if self.compress:
-                    pal=zlib.compress(info['pal'])
+                pal = self._compress(info['pal'], 'image')
+                if pal is not None:
+                    filter = '/Filter /FlateDecode '
                 else:
-                    pal=info['pal']
+                    filter = ''
+                    pal = info['pal']
                 self._out('<<'+filter+'/Length '+str(len(pal))+'>>')
                 self._putstream(pal)
                 self._out('endobj')
 
+    def _putstamps(self):
+        level = self._compress_level('page')
+        for stamp in self.stamps:
+            p = self._getcontent(stamp)
+            filter = ''
+            if level is not None:
+                p = zlib.compress(p, level)
+                filter = '/Filter /FlateDecode '
+            self._newobj()
+            stamp['n'] = self.n
+            self._out('<</Type /XObject /Subtype /Form')
+            self._out(sprintf('/BBox [%.2f %.2f %.2f %.2f]', *(stamp['bbox']
+                              or (0, 0, stamp['w_pt'], stamp['h_pt']))))
+            self._out('/Resources 2 0 R')
+            self._out(filter + '/Length ' + str(len(p)) + '>>')
+            self._putstream(p)
+            self._out('endobj')
+
     def _putxobjectdict(self):
         i = [(x["i"],x["n"]) for x in self.images.values()]
         i.sort()
         for idx,n in i:
             self._out('/I'+str(idx)+' '+str(n)+' 0 R')
+        for stamp in self.stamps:
+            self._out('/S' + str(stamp['i']) + ' ' + str(stamp['n']) + ' 0 R')
 
     def _putresourcedict(self):
         self._out('/ProcSet [/PDF /Text /ImageB /ImageC /ImageI]')
@@ -1635,9 +2049,9 @@ class FPDF(object):
     def _putresources(self):
         self._putfonts()
         self._putimages()
+        self._putstamps()
         #Resource dictionary
-        self.offsets[2]=len(self.buffer)
-        self._out('2 0 obj')
+        self._newobj(2)
         self._out('<<')
         self._putresourcedict()
         self._out('>>')
@@ -1660,6 +2074,9 @@ class FPDF(object):
     def _putcatalog(self):
         self._out('/Type /Catalog')
         self._out('/Pages 1 0 R')
+        if self.pdf_version > self.header_version:
+            # header was written before the version was raised (streaming)
+            self._out('/Version /' + self.pdf_version)
         if(self.zoom_mode=='fullpage'):
             self._out('/OpenAction [3 0 R /Fit]')
         elif(self.zoom_mode=='fullwidth'):
@@ -1676,6 +2093,7 @@ class FPDF(object):
             self._out('/PageLayout /TwoColumnLeft')
 
     def _putheader(self):
+        self.header_version = self.pdf_version
         self._out('%PDF-'+self.pdf_version)
 
     def _puttrailer(self):
@@ -1684,7 +2102,8 @@ class FPDF(object):
         self._out('/Info '+str(self.n-1)+' 0 R')
 
     def _enddoc(self):
-        self._putheader()
+        if not self.stream:
+            self._putheader()
         self._putpages()
         self._putresources()
         #Info
@@ -1699,8 +2118,11 @@ class FPDF(object):
         self._putcatalog()
         self._out('>>')
         self._out('endobj')
+        if self.object_streams:
+            self._putxrefstream(self.n)
+            return
         #Cross-ref
-        o=len(self.buffer)
+        o=self.buffer_size
         self._out('xref')
         self._out('0 '+(str(self.n+1)))
         self._out('0000000000 65535 f ')
@@ -1716,9 +2138,77 @@ class FPDF(object):
         self._out('%%EOF')
         self.state=3
 
+    def _putobjstm(self, objects):
+        # Pack objects in an object stream
+        self.n += 1
+        header = []
+        offset = 0
+        for i, (n, data) in enumerate(objects):
+            self.objstm_index[n] = (self.n, i)
+            header.append('%d %d' % (n, offset))
+            offset += len(data) + 1
+        header = b(' '.join(header) + '\n')
+        data = header + b('\n').join([data for n, data in objects])
+        filter = ''
+        compressed = self._compress(data, 'object')
+        if compressed is not None:
+            data = compressed
+            filter = '/Filter /FlateDecode '
+        self.offsets[self.n] = self.buffer_size
+        self._out(str(self.n) + ' 0 obj')
+        self._out('<</Type /ObjStm /N %d /First %d %s/Length %d>>' %
+                  (len(objects), len(header), filter, len(data)))
+        self._putstream(data)
+        self._out('endobj')
+
+    def _putxrefstream(self, root):
+        # Cross-reference stream (replaces both xref table and trailer)
+        # Packed objects are written last, as object numbers used by pages
+        # are computed in advance (100 objects by object stream)
+        pending = self.objstm_pending
+        self.objstm_pending = []
+        for i in range(0, len(pending), 100):
+            self._putobjstm(pending[i:i + 100])
+        self.n += 1
+        o = self.buffer_size
+        self.offsets[self.n] = o
+        entries = [(0, 0, 65535)]
+        for i in range(1, self.n + 1):
+            if i in self.objstm_index:
+                entries.append((2, ) + self.objstm_index[i])
+            else:
+                entries.append((1, self.offsets[i], 0))
+        # field widths (in bytes) large enough for every value
+        w = [1] + [(len('%x' % max([e[f] for e in entries])) + 1) // 2
+                   for f in (1, 2)]
+        data = b('').join([struct.pack('>B', e[0]) +
+                           struct.pack('>Q', e[1])[8 - w[1]:] +
+                           struct.pack('>Q', e[2])[8 - w[2]:]
+                           for e in entries])
+        filter = ''
+        compressed = self._compress(data, 'object')
+        if compressed is not None:
+            data = compressed
+            filter = '/Filter /FlateDecode '
+        self._out(str(self.n) + ' 0 obj')
+        self._out('<</Type /XRef /Size %d /W [%d %d %d]' %
+                  (self.n + 1, w[0], w[1], w[2]))
+        self._out('/Root %d 0 R /Info %d 0 R' % (root, root - 1))
+        self._out(filter + '/Length ' + str(len(data)) + '>>')
+        self._putstream(data)
+        self._out('endobj')
+        self._out('startxref')
+        self._out(o)
+        self._out('%%EOF')
+        self.state=3
+
     def _beginpage(self, orientation, format, same):
         self.page += 1
-        self.pages[self.page] = {"content": ""}
+        # chunks of content, chunks holding the alias for number of pages,
+        # graphics state stack (operators in effect, by operator name)
+        self.pages[self.page] = {"content": [], "nb": [], "gstate": [{
+            'RG': '0 G', 'rg': '0 g', 'd': '[] 0 d',
+            'Tz': 'BT 100.00 Tz ET'}]}
         self.state = 2
         self.x = self.l_margin
         self.y = self.t_margin
@@ -1757,19 +2247,135 @@ class FPDF(object):
     def _endpage(self):
         #End of page contents
         self.state=1
+        if self.stream:
+            # Write finished page content now (object number is fixed)
+            if self.page == 1:
+                self._putheader()
+            p = self._getpagecontent(self.page)
+            self.pages[self.page]["content"] = []
+            level = self._compress_level('page')
+            if level is not None:
+                p = zlib.compress(p, level)
+            self._putpagecontent(p, 2 + 2 * self.page)
+
+    def _newobj(self, n=None):
+        #Begin a new object (or a reserved one, if n is given)
+        if n is None:
+            self.n+=1
+            n=self.n
+        if self.object_streams:
+            # hold the object back, it is packed unless it has a stream
+            self.obj_held = (n, [])
+            return
+        self.offsets[n]=self.buffer_size
+        self._out(str(n)+' 0 obj')
+
+    def _setgstate(self, op, s):
+        # Output a graphics state operator, unless it is already in effect
+        gstate = self.pages[self.page]["gstate"][-1]
+        if gstate.get(op) != s:
+            gstate[op] = s
+            self._out(s)
 
-    def _newobj(self):
-        #Begin a new object
-        self.n+=1
-        self.offsets[self.n]=len(self.buffer)
-        self._out(str(self.n)+' 0 obj')
+    def _char_widths(self, s):
+        # Widths of the characters of a string in a non unicode font
+        # (looked up at C speed, characters are latin-1 codes; others are
+        # not in the font and are measured as 0)
+        widths = self.current_font['widths']
+        if isinstance(s, unicode):
+            try:
+                s = s.encode('latin1')
+            except UnicodeEncodeError:
+                return [widths[o] if o < 256 else 0 for o in map(ord, s)]
+        return list(map(widths.__getitem__, bytearray(s)))
+
+    def _text_widths(self, s):
+        # Widths of the characters of a text in the current font (in 1/1000
+        # of the font size), as measured by get_string_width
+        if not self.unifontsubset:
+            return self._char_widths(s)
+        cw=self.current_font['cw']
+        dw=self.current_font['missingwidth']
+        missing=self.current_font['desc'].get('MissingWidth') or 500
+        n=len(cw)
+        widths=[(cw[o] or dw) if o<n else missing for o in map(ord, s)]
+        if self.font_stretching != 100:
+            widths=[w*self.font_stretching/100.0 for w in widths]
+        # rounded as each character width was measured in user units
+        size=self.font_size
+        return [w*size/1000.0/size*1000.0 for w in widths]
+
+    def _splitlines(self, s, nb, wmax, wnext=None, move=False):
+        # Line breaking engine of multi_cell and write: break s[:nb] in lines
+        # no wider than wmax (then wnext) at spaces, inside words that do not
+        # fit or at explicit line breaks. Yields (brk, start, end, ns, width)
+        # for each line, where brk is 'space' (ns spaces up to the break,
+        # width of the line), 'char', 'newline', None for the last chunk
+        # (whole width) or 'move' if the first line has to start below
+        # (only if move is set, when the text does not begin at the margin)
+        if wnext is None:
+            wnext=wmax
+        # cumulative advance widths (to guess break points), and spaces
+        widths=self._text_widths(s[:nb])
+        cum=[0]
+        cum.extend(accumulate(widths))
+        spaces=[]
+        i=s.find(' ',0,nb)
+        while i>=0:
+            spaces.append(i)
+            i=s.find(' ',i+1,nb)
+        j=0
+        lo=0
+        while True:
+            #End of the paragraph
+            k=s.find("\n",j,nb)
+            if k<0:
+                k=nb
+            #First character exceeding the maximum width: guessed from the
+            #cumulative widths, then checked with the widths of the line
+            #summed from its start (as in the running total of the original
+            #loop, differences of cumulative widths can round otherwise)
+            i=bisect_right(cum,cum[j]+wmax,lo+1,k+1)-1
+            end=min(i+2,k)
+            run=list(accumulate(widths[j:end]))
+            t=bisect_right(run,wmax,lo-j)
+            while t==len(run) and end<k:
+                start,end=end,min(k,2*end-j+16)
+                run.extend(accumulate([run[-1] if run else 0]+widths[start:end]))
+                del run[start-j]
+                t=bisect_right(run,wmax,lo-j)
+            i=j+t
+            if i>=k:
+                if k==nb:
+                    yield None, j, nb, 0, run and run[-1] or 0
+                    return
+                yield 'newline', j, k, 0, run and run[-1] or 0
+                j=lo=k+1
+            else:
+                #Last space up to this character (in the current line)
+                n=bisect_right(spaces,i)
+                ns=n-bisect_left(spaces,j,0,n)
+                if ns:
+                    sep=spaces[n-1]
+                    yield 'space', j, sep, ns, sep>j and run[sep-j-1] or 0
+                    j=lo=sep+1
+                elif move:
+                    yield 'move', j, j, 0, 0
+                    lo=i+1
+                else:
+                    if i==j:
+                        i+=1
+                    yield 'char', j, i, 0, run[i-j-1]
+                    j=lo=i
+            wmax=wnext
+            move=False
 
     def _dounderline(self, x, y, txt):
         #Underline text
         up=self.current_font['up']
         ut=self.current_font['ut']
         w=self.get_string_width(txt, True)+self.ws*txt.count(' ')
-        return sprintf('%.2f %.2f %.2f %.2f re f',x*self.k,(self.h-(y-up/1000.0*self.font_size))*self.k,w*self.k,-ut/1000.0*self.font_size_pt)
+        return self.ops['re'] % (x*self.k,self.h_pt-(y-up/1000.0*self.font_size)*self.k,w*self.k,-ut/1000.0*self.font_size_pt,'f')
 
     def load_resource(self, reason, filename):
         "Load external file"
@@ -1947,8 +2553,12 @@ class FPDF(object):
                     color += re_c.sub(lambda m: m.group(1), line)
                     alpha += re_a.sub(lambda m: m.group(1), line)
             del data
-            data = zlib.compress(color)
-            info['smask'] = zlib.compress(alpha)
+            # PNG data must stay compressed (FlateDecode with predictor)
+            level = self.compression.get_level('image')
+            if level is None:
+                level = -1
+            data = zlib.compress(color, level)
+            info['smask'] = zlib.compress(alpha, level)
             if (self.pdf_version < '1.4'):
                 self.pdf_version = '1.4'
         info['data'] = data
@@ -1969,6 +2579,16 @@ class FPDF(object):
         #Add \ before \, ( and )
         return s.replace('\\','\\\\').replace(')','\\)').replace('(','\\(').replace('\r','\\r')
 
+    def _utf16(self, txt):
+        # Escaped UTF-16BE encoding of a text in a TTF font, memoized as the
+        # same labels, headers and words are usually repeated on every page
+        s = self.encoded_texts.get(txt)
+        if s is None:
+            if len(self.encoded_texts) >= 4096:
+                self.encoded_texts.clear()
+            s = self.encoded_texts[txt] = self._escape(UTF8ToUTF16BE(txt, False))
+        return s
+
     def _putstream(self, s):
         self._out('stream')
         self._out(s)
@@ -1976,17 +2596,48 @@ class FPDF(object):
 
     def _out(self, s):
         #Add a line to the document
-        if PY3K and isinstance(s, bytes):
-            # manage binary data as latin1 until PEP461-like function is implemented
-            s = s.decode("latin1")
-        elif not PY3K and isinstance(s, unicode):
-            s = s.encode("latin1")    # default encoding (font name and similar)
-        elif not isinstance(s, basestring):
-            s = str(s)
         if(self.state == 2):
-            self.pages[self.page]["content"] += (s + "\n")
+            # page content is kept as text chunks, encoded once when written
+            if PY3K and isinstance(s, bytes):
+                s = s.decode("latin1")
+            elif not PY3K and isinstance(s, unicode):
+                s = s.encode("latin1")    # default encoding (font name and similar)
+            elif not isinstance(s, basestring):
+                s = str(s)
+            self.pages[self.page]["content"].append(s + "\n")
+        else:
+            # binary data (streams) is written as is, text encoded only once
+            if isinstance(s, unicode):
+                s = s.encode("latin1")
+            elif not isinstance(s, bytes):
+                s = b(str(s))
+            if self.obj_held is not None:
+                self._holdobj(s)
+                return
+            if self.stream:
+                self.stream.write(s)
+                self.stream.write(b("\n"))
+            else:
+                self.buffer += s
+                self.buffer += b("\n")
+            self.buffer_size += len(s) + 1
+
+    def _holdobj(self, s):
+        # Object streams: keep lines of the current object until it ends
+        n, lines = self.obj_held
+        if s == b('endobj'):
+            self.obj_held = None
+            self.objstm_pending.append((n, b('\n').join(lines)))
+        elif s == b('stream'):
+            # stream objects can't be packed: write held lines now
+            self.obj_held = None
+            self.offsets[n] = self.buffer_size
+            self._out(str(n) + ' 0 obj')
+            for line in lines:
+                self._out(line)
+            self._out(s)
         else:
-            self.buffer += (s + "\n")
+            lines.append(s)
 
     @check_page
     def interleaved2of5(self, txt, x, y, w=1.0, h=10.0):
@@ -32,6 +32,21 @@ except ImportError:
         from md5 import md5
     except ImportError:
         md5 = None
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    OrderedDict = None          # Python < 2.7 (no string width cache)
+
+try:
+    from itertools import accumulate
+except ImportError:
+    def accumulate(iterable):   # Python < 3.2 (running totals only)
+        total = 0
+        for x in iterable:
+            total += x
+            yield total
+
 def hashpath(fn):
     h = md5()
     if PY3K:
@@ -18,10 +18,14 @@
 
 from __future__ import with_statement
 
-from struct import pack, unpack, unpack_from
+from struct import pack, pack_into, unpack, unpack_from
+from array import array
+from contextlib import contextmanager
+import mmap
 import re
+import sys
 import warnings
-from .php import die, substr, str_repeat, str_pad, strlen, count
+from .php import die, substr, count
 from .py3k import b, ord
 
 
@@ -41,6 +45,16 @@ GF_XYSCALE  = (1 << 6)
 GF_TWOBYTWO = (1 << 7)
 
 
+@contextmanager
+def mapfile(filename):
+    "Map a font file in memory (read only), unmapped when leaving the block"
+    with open(filename, 'rb') as fh:
+        data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield data
+    finally:
+        data.close()
+
 def sub32(x, y):
     xlo = x[1]
     xhi = x[0]
@@ -56,28 +70,30 @@ def sub32(x, y):
     reshi = reshi & 0xFFFF
     return (reshi, reslo)
 
+# unsigned 32 bit integers (to sum the words of a table at once)
+for _UINT32 in 'IL':
+    if array(_UINT32).itemsize == 4:
+        break
+else:
+    die("No 32 bit unsigned integer array type for table checksums")
+
 def calcChecksum(data): 
-    if (strlen(data) % 4):
-        data += str_repeat(b("\0"), (4-(len(data) % 4)))
-    hi=0x0000
-    lo=0x0000
-    for i in range(0, len(data), 4): 
-        hi += (ord(data[i])<<8) + ord(data[i+1])
-        lo += (ord(data[i+2])<<8) + ord(data[i+3])
-        hi += lo >> 16
-        lo = lo & 0xFFFF
-        hi = hi & 0xFFFF
-    return (hi, lo)
+    "Sum of the big endian 32 bit words of data, as (hi, lo) 16 bit halves"
+    data = bytes(data)
+    if (len(data) % 4):
+        data += b("\0") * (4 - len(data) % 4)
+    words = array(_UINT32, data)
+    if sys.byteorder == 'little':
+        words.byteswap()
+    total = sum(words) & 0xFFFFFFFF
+    return (total >> 16, total & 0xFFFF)
 
 
 class TTFontFile:
 
-    def __init__(self):
-        self.maxStrLenRead = 200000    # Maximum size of glyf table to read in as string (otherwise reads each glyph from file)
-
     def getMetrics(self, file):
         self.filename = file
-        with open(file,'rb') as self.fh:
+        with mapfile(file) as self.fh:
             self._pos = 0
             self.charWidths = []
             self.glyphPos = {}
@@ -116,31 +132,27 @@ class TTFontFile:
         length = self.tables[tag]['length']
         return (offset, length)
     
+    # The font file is mapped in memory (self.fh): fields are unpacked at
+    # the current position (self._pos) or at a given position, no file I/O
+
     def seek(self, pos): 
         self._pos = pos
-        self.fh.seek(self._pos)
     
     def skip(self, delta): 
         self._pos = self._pos + delta
-        self.fh.seek(self._pos)
     
     def seek_table(self, tag, offset_in_table = 0):
         tpos = self.get_table_pos(tag)
         self._pos = tpos[0] + offset_in_table
-        self.fh.seek(self._pos)
         return self._pos
 
     def read_tag(self):
         self._pos += 4
-        return self.fh.read(4).decode("latin1")
+        return self.fh[self._pos - 4:self._pos].decode("latin1")
 
     def read_short(self): 
         self._pos += 2
-        s = self.fh.read(2)
-        a = (ord(s[0])<<8) + ord(s[1])
-        if (a & (1 << 15) ):
-            a = (a - (1 << 16)) 
-        return a
+        return unpack_from(">h", self.fh, self._pos - 2)[0]
     
     def unpack_short(self, s):
         a = (ord(s[0])<<8) + ord(s[1])
@@ -150,25 +162,25 @@ class TTFontFile:
     
     def read_ushort(self):
         self._pos += 2
-        s = self.fh.read(2)
-        return (ord(s[0])<<8) + ord(s[1])
+        return unpack_from(">H", self.fh, self._pos - 2)[0]
 
     def read_ulong(self): 
         self._pos += 4
-        s = self.fh.read(4)
-        # if large uInt32 as an integer, PHP converts it to -ve
-        return (ord(s[0])*16777216) + (ord(s[1])<<16) + (ord(s[2])<<8) + ord(s[3]) #     16777216  = 1<<24
+        return unpack_from(">L", self.fh, self._pos - 4)[0]
+
+    def read_ushorts(self, count):
+        "Read an array of count unsigned shorts"
+        self._pos += 2 * count
+        return unpack_from(">%dH" % count, self.fh, self._pos - 2 * count)
 
     def get_ushort(self, pos): 
-        self.fh.seek(pos)
-        s = self.fh.read(2)
-        return (ord(s[0])<<8) + ord(s[1])
+        return unpack_from(">H", self.fh, pos)[0]
+
+    def get_short(self, pos): 
+        return unpack_from(">h", self.fh, pos)[0]
 
     def get_ulong(self, pos):
-        self.fh.seek(pos)
-        s = self.fh.read(4)
-        # iF large uInt32 as an integer, PHP converts it to -ve
-        return (ord(s[0])*16777216) + (ord(s[1])<<16) + (ord(s[2])<<8) + ord(s[3]) #     16777216  = 1<<24    
+        return unpack_from(">L", self.fh, pos)[0]
 
     def pack_short(self, val):
         if (val<0):
@@ -178,7 +190,9 @@ class TTFontFile:
         return pack(">H",val) 
     
     def splice(self, stream, offset, value):
-        return substr(stream,0,offset) + value + substr(stream,offset+strlen(value))
+        stream = bytearray(stream)
+        stream[offset:offset + len(value)] = value
+        return bytes(stream)
     
     def _set_ushort(self, stream, offset, value):
         up = pack(">H", value)
@@ -193,16 +207,14 @@ class TTFontFile:
         return self.splice(stream, offset, up)
 
     def get_chunk(self, pos, length): 
-        self.fh.seek(pos)
-        if (length <1):  return '' 
-        return (self.fh.read(length))
+        if (length <1):  return b('')
+        return self.fh[pos:pos + length]
 
     def get_table(self, tag):
         (pos, length) = self.get_table_pos(tag)
         if (length == 0):
             die('Truetype font (' + self.filename + '): error reading table: ' + tag) 
-        self.fh.seek(pos)
-        return (self.fh.read(length))
+        return self.fh[pos:pos + length]
 
     def add(self, tag, data):
         if (tag == 'head') :
@@ -245,11 +257,7 @@ class TTFontFile:
                 if (length % 2 != 0):
                     die("PostScript name is UTF-16BE string of odd length")
                 length //= 2
-                N = ''
-                while (length > 0):
-                    char = self.read_ushort()
-                    N += (chr(char))
-                    length -= 1
+                N = ''.join(map(chr, self.read_ushorts(length)))
                 self._pos = opos
                 self.seek(opos)
             
@@ -346,7 +354,6 @@ class TTFontFile:
             self.sFamilyClass = (sF >> 8)
             self.sFamilySubClass = (sF & 0xFF)
             self._pos += 10  #PANOSE = 10 byte length
-            panose = self.fh.read(10)
             self.skip(26)
             sTypoAscender = self.read_short()
             sTypoDescender = self.read_short()
@@ -451,13 +458,21 @@ class TTFontFile:
         #################/
         self.getHMTX(numberOfHMetrics, numGlyphs, glyphToChar, scale)
 
+        #################/
+        # loca / glyf - Components of the composite glyphs
+        #################/
+        self.getLOCA(indexToLocFormat, numGlyphs)
+        self.compositeGlyphs = self.getCompositeGlyphs()
+
 
 ############################################/
 ############################################/
 
-    def makeSubset(self, file, subset):
+    def makeSubset(self, file, subset, composites=None):
+        # composites: components of the composite glyphs of the font (see
+        # getCompositeGlyphs), read from the glyf table if not given
         self.filename = file
-        with open(file ,'rb') as self.fh:
+        with mapfile(file) as self.fh:
             self._pos = 0
             self.charWidths = []
             self.glyphPos = {}
@@ -543,17 +558,16 @@ class TTFontFile:
             #################/
             self.getLOCA(indexToLocFormat, numGlyphs)
 
-            subsetglyphs = [(0, 0)]     # special "sorted dict"!
+            subsetglyphs = set([(0, 0)])     # special "sorted dict"!
             subsetCharToGlyph = {}
-            for code in subset: 
+            for code in set(subset):
                 if (code in self.charToGlyph):
-                    if (self.charToGlyph[code], code) not in subsetglyphs:
-                        subsetglyphs.append((self.charToGlyph[code], code))   # Old Glyph ID => Unicode
+                    subsetglyphs.add((self.charToGlyph[code], code))   # Old Glyph ID => Unicode
                     subsetCharToGlyph[code] = self.charToGlyph[code]    # Unicode to old GlyphID
                 self.maxUni = max(self.maxUni, code)
             (start,dummy) = self.get_table_pos('glyf')
 
-            subsetglyphs.sort()
+            subsetglyphs = sorted(subsetglyphs)
             glyphSet = {}
             n = 0
             fsLastCharIndex = 0    # maximum Unicode index (character code) in this font, according to the cmap subtable for platform ID 3 and platform- specific encoding ID 0 or 1.
@@ -568,9 +582,10 @@ class TTFontFile:
             
             self.codeToGlyph = codeToGlyph
             
+            nonlocals = {'start': start, 'glyphSet': glyphSet, 
+                         'subsetglyphs': subsetglyphs,
+                         'composites': composites, 'done': set()}
             for originalGlyphIdx, uni in subsetglyphs: 
-                nonlocals = {'start': start, 'glyphSet': glyphSet, 
-                             'subsetglyphs': subsetglyphs}
                 self.getGlyphs(originalGlyphIdx, nonlocals)
 
             numGlyphs = numberOfHMetrics = len(subsetglyphs)
@@ -660,7 +675,7 @@ class TTFontFile:
                 cmap.extend(glidx)
             
             cmap.append(0)    # Mapping for last character
-            cmapstr = b('')
+            cmapstr = bytearray()
             for cm in cmap:
                 if cm >= 0:
                     cmapstr += pack(">H", cm) 
@@ -670,18 +685,16 @@ class TTFontFile:
                     except:
                         warnings.warn("cmap value too big/small: %s" % cm)
                         cmapstr += pack(">H", -cm) 
-            self.add('cmap', cmapstr)
+            self.add('cmap', bytes(cmapstr))
 
             # glyf - Glyph data
             (glyfOffset,glyfLength) = self.get_table_pos('glyf')
-            if (glyfLength < self.maxStrLenRead):
-                glyphData = self.get_table('glyf')
 
             offsets = []
-            glyf = b('')
+            glyf = bytearray()
             pos = 0
 
-            hmtxstr = b('')
+            hmtxstr = bytearray()
             xMinT = 0
             yMinT = 0
             xMaxT = 0
@@ -711,29 +724,21 @@ class TTFontFile:
                     warnings.warn("missing glyph %s" % (originalGlyphIdx))
                     glyphLen = 0
 
-                if (glyfLength < self.maxStrLenRead):
-                    data = substr(glyphData,glyphPos,glyphLen)
-                else:
-                    if (glyphLen > 0):
-                        data = self.get_chunk(glyfOffset+glyphPos,glyphLen)
-                    else:
-                        data = b('')
+                data = self.get_chunk(glyfOffset+glyphPos,glyphLen)
                 
                 if (glyphLen > 0):
                     up = unpack(">H", substr(data,0,2))[0]
                 if (glyphLen > 2 and (up & (1 << 15)) ):     # If number of contours <= -1 i.e. composite glyph
+                    data = bytearray(data)      # glyph indexes updated in place
                     pos_in_glyph = 10
                     flags = GF_MORE
                     nComponentElements = 0
                     while (flags & GF_MORE):
                         nComponentElements += 1    # number of glyphs referenced at top level
-                        up = unpack(">H", substr(data,pos_in_glyph,2))
-                        flags = up[0]
-                        up = unpack(">H", substr(data,pos_in_glyph+2,2))
-                        glyphIdx = up[0]
+                        flags, glyphIdx = unpack_from(">HH", data, pos_in_glyph)
                         self.glyphdata.setdefault(originalGlyphIdx, {}).setdefault('compGlyphs', []).append(glyphIdx)
                         try:
-                            data = self._set_ushort(data, pos_in_glyph + 2, glyphSet[glyphIdx])
+                            pack_into(">H", data, pos_in_glyph + 2, glyphSet[glyphIdx])
                         except KeyError:
                             data = 0
                             warnings.warn("missing glyph data %s" % glyphIdx)
@@ -755,25 +760,23 @@ class TTFontFile:
                 pos += glyphLen
                 if (pos % 4 != 0): 
                     padding = 4 - (pos % 4)
-                    glyf += str_repeat(b("\0"),padding)
+                    glyf += b("\0") * padding
                     pos += padding
 
             offsets.append(pos)
-            self.add('glyf', glyf)
+            self.add('glyf', bytes(glyf))
 
             # hmtx - Horizontal Metrics
-            self.add('hmtx', hmtxstr)
+            self.add('hmtx', bytes(hmtxstr))
 
             # loca - Index to location
-            locastr = b('')
             if (((pos + 1) >> 1) > 0xFFFF): 
                 indexToLocFormat = 1        # long format
-                for offset in offsets:
-                    locastr += pack(">L",offset) 
+                locastr = pack(">%dL" % len(offsets), *offsets)
             else:
                 indexToLocFormat = 0        # short format
-                for offset in offsets:  
-                    locastr += pack(">H",offset//2) 
+                locastr = pack(">%dH" % len(offsets),
+                               *[offset // 2 for offset in offsets])
             
             self.add('loca', locastr)
 
@@ -821,67 +824,82 @@ class TTFontFile:
     #########################################
     # Recursively get composite glyphs
     def getGlyphs(self, originalGlyphIdx, nonlocals):
-        # &start, &glyphSet, &subsetglyphs) 
-        
-        try:
-            glyphPos = self.glyphPos[originalGlyphIdx]
-            glyphLen = self.glyphPos[originalGlyphIdx + 1] - glyphPos
-        except IndexError:
-            warnings.warn("missing glyph %s" % (originalGlyphIdx))
+        # &start, &glyphSet, &subsetglyphs, &composites, &done
+        # (components of the glyphs in done are already in the subset)
+        if (originalGlyphIdx in nonlocals['done']):
             return
+        nonlocals['done'].add(originalGlyphIdx)
 
-        if (not glyphLen):  
-            return
-        
-        self.seek(nonlocals['start'] + glyphPos)
-        numberOfContours = self.read_short()
-        if (numberOfContours < 0):
-            self.skip(8)
-            flags = GF_MORE
-            while (flags & GF_MORE): 
-                flags = self.read_ushort()
-                glyphIdx = self.read_ushort()
-                if (glyphIdx not in nonlocals['glyphSet']):
-                    nonlocals['glyphSet'][glyphIdx] = len(nonlocals['subsetglyphs'])    # old glyphID to new glyphID
-                    nonlocals['subsetglyphs'].append((glyphIdx, 1))
-                
-                savepos = self.fh.tell()
-                self.getGlyphs(glyphIdx, nonlocals)
-                self.seek(savepos)
-                if (flags & GF_WORDS):
-                    self.skip(4)
-                else:
-                    self.skip(2)
-                if (flags & GF_SCALE):
-                    self.skip(2)
-                elif (flags & GF_XYSCALE):
-                    self.skip(4)
-                elif (flags & GF_TWOBYTWO):
-                    self.skip(8)
+        if (nonlocals['composites'] is not None):
+            components = nonlocals['composites'].get(originalGlyphIdx, ())
+        else:
+            try:
+                glyphPos = self.glyphPos[originalGlyphIdx]
+                glyphLen = self.glyphPos[originalGlyphIdx + 1] - glyphPos
+            except IndexError:
+                warnings.warn("missing glyph %s" % (originalGlyphIdx))
+                return
+            if (not glyphLen or
+                self.get_short(nonlocals['start'] + glyphPos) >= 0):
+                return
+            components = self.getComponents(nonlocals['start'] + glyphPos)
+
+        for glyphIdx in components:
+            if (glyphIdx not in nonlocals['glyphSet']):
+                nonlocals['glyphSet'][glyphIdx] = len(nonlocals['subsetglyphs'])    # old glyphID to new glyphID
+                nonlocals['subsetglyphs'].append((glyphIdx, 1))
+            self.getGlyphs(glyphIdx, nonlocals)
+
+    def getComponents(self, glyphPos):
+        "Return the component glyphs of the composite glyph at glyphPos"
+        pos = glyphPos + 10
+        components = []
+        flags = GF_MORE
+        while (flags & GF_MORE): 
+            flags, glyphIdx = unpack_from(">HH", self.fh, pos)
+            components.append(glyphIdx)
+            pos += 4
+            if (flags & GF_WORDS):
+                pos += 4
+            else:
+                pos += 2
+            if (flags & GF_SCALE):
+                pos += 2
+            elif (flags & GF_XYSCALE):
+                pos += 4
+            elif (flags & GF_TWOBYTWO):
+                pos += 8
+        return components
+
+    def getCompositeGlyphs(self):
+        "Return the components of all the composite glyphs: {glyph: [glyphs]}"
+        start = self.get_table_pos('glyf')[0]
+        glyphPos = self.glyphPos
+        composites = {}
+        # the length of the last glyph is unknown (see getLOCA)
+        for glyph in range(len(glyphPos) - 1):
+            pos = glyphPos[glyph]
+            if (glyphPos[glyph + 1] != pos and self.get_short(start + pos) < 0):
+                composites[glyph] = self.getComponents(start + pos)
+        return composites
 
     #########################################
 
     def getHMTX(self, numberOfHMetrics, numGlyphs, glyphToChar, scale):
         start = self.seek_table("hmtx")
         aw = 0
-        self.charWidths = []
-        def resize_cw(size, default):
+        # widths as unsigned shorts: 0 for characters not in the font (their
+        # width is defaultWidth), 65535 for a zero width
+        self.charWidths = array('H')
+        def resize_cw(size):
             size = (((size + 1) // 1024) + 1) * 1024
             delta = size - len(self.charWidths)
             if delta > 0:
-                self.charWidths += [default] * delta
+                self.charWidths += array('H', [0]) * delta
         nCharWidths = 0
-        if ((numberOfHMetrics*4) < self.maxStrLenRead): 
-            data = self.get_chunk(start,(numberOfHMetrics*4))
-            arr = unpack(">%dH" % (len(data)//2), data)
-        else:
-            self.seek(start) 
+        arr = unpack_from(">%dH" % (numberOfHMetrics*2), self.fh, start)
         for glyph in range(numberOfHMetrics): 
-            if ((numberOfHMetrics*4) < self.maxStrLenRead):
-                aw = arr[(glyph*2)] # PHP starts arrays from index 0!? +1
-            else:
-                aw = self.read_ushort()
-                lsb = self.read_ushort()
+            aw = arr[(glyph*2)] # PHP starts arrays from index 0!? +1
             
             if (glyph in glyphToChar or glyph == 0):
                 if (aw >= (1 << 15) ):
@@ -897,8 +915,8 @@ class TTFontFile:
                         if (w == 0):  w = 65535 
                         if (char < 196608):
                             if char >= len(self.charWidths):
-                                resize_cw(char, self.defaultWidth)
-                            self.charWidths[char] = w 
+                                resize_cw(char)
+                            self.charWidths[char] = min(w, 65535)
                             nCharWidths += 1
             
         
@@ -914,26 +932,23 @@ class TTFontFile:
                         if (w == 0):  w = 65535 
                         if (char < 196608):
                             if char >= len(self.charWidths):
-                                resize_cw(char, self.defaultWidth)
-                            self.charWidths[char] = w
+                                resize_cw(char)
+                            self.charWidths[char] = min(w, 65535)
                             nCharWidths += 1 
                         
         
         # NB 65535 is a set width of 0
         # First bytes define number of chars in font
-        self.charWidths[0] = nCharWidths 
+        self.charWidths[0] = min(nCharWidths, 65535)
     
 
     def getHMetric(self, numberOfHMetrics, gid): 
-        start = self.seek_table("hmtx")
+        start = self.get_table_pos("hmtx")[0]
         if (gid < numberOfHMetrics):
-            self.seek(start+(gid*4))
-            hm = self.fh.read(4)
+            hm = self.get_chunk(start+(gid*4), 4)
         else:
-            self.seek(start+((numberOfHMetrics-1)*4))
-            hm = self.fh.read(2)
-            self.seek(start+(numberOfHMetrics*2)+(gid*2))
-            hm += self.fh.read(2)
+            hm = self.get_chunk(start+((numberOfHMetrics-1)*4), 2)
+            hm += self.get_chunk(start+(numberOfHMetrics*2)+(gid*2), 2)
         return hm
     
 
@@ -941,15 +956,10 @@ class TTFontFile:
         start = self.seek_table('loca')
         self.glyphPos = []
         if (indexToLocFormat == 0):
-            data = self.get_chunk(start,(numGlyphs*2)+2)
-            arr = unpack(">%dH" % (len(data)//2), data)
-            for n in range(numGlyphs): 
-                self.glyphPos.append((arr[n] * 2))  # n+1 !?
+            arr = unpack_from(">%dH" % numGlyphs, self.fh, start)
+            self.glyphPos = [pos * 2 for pos in arr]    # n+1 !?
         elif (indexToLocFormat == 1):
-            data = self.get_chunk(start,(numGlyphs*4)+4)
-            arr = unpack(">%dL" % (len(data)//4), data)
-            for n in range(numGlyphs):
-                self.glyphPos.append((arr[n]))  # n+1 !?
+            self.glyphPos = list(unpack_from(">%dL" % numGlyphs, self.fh, start))
         else:
             die('Unknown location table format ' + indexToLocFormat)
 
@@ -963,40 +973,30 @@ class TTFontFile:
 
         segCount = self.read_ushort() // 2
         self.skip(6)
-        endCount = []
-        for i in range(segCount):
-            endCount.append(self.read_ushort())
+        endCount = self.read_ushorts(segCount)
         self.skip(2)
-        startCount = []
-        for i in range(segCount):
-            startCount.append(self.read_ushort()) 
-        idDelta = []
-        for i in range(segCount):
-            idDelta.append(self.read_short())         # ???? was unsigned short
+        startCount = self.read_ushorts(segCount)
+        idDelta = unpack_from(">%dh" % segCount, self.fh, self._pos)   # ???? was unsigned short
+        self.skip(2 * segCount)
         idRangeOffset_start = self._pos
-        idRangeOffset = []
-        for i in range(segCount):
-            idRangeOffset.append(self.read_ushort()) 
+        idRangeOffset = self.read_ushorts(segCount)
 
+        # glyphs of each segment are computed (or unpacked) all at once
         for n in range(segCount): 
-            endpoint = (endCount[n] + 1)
-            for unichar in range(startCount[n], endpoint, 1): 
-                if (idRangeOffset[n] == 0):
-                    glyph = (unichar + idDelta[n]) & 0xFFFF
-                else:
-                    offset = (unichar - startCount[n]) * 2 + idRangeOffset[n]
-                    offset = idRangeOffset_start + 2 * n + offset
-                    if (offset >= limit):
-                        glyph = 0
-                    else:
-                        glyph = self.get_ushort(offset)
-                        if (glyph != 0):
-                           glyph = (glyph + idDelta[n]) & 0xFFFF
-                    
-                charToGlyph[unichar] = glyph
-                if (unichar < 196608):
-                    self.maxUniChar = max(unichar,self.maxUniChar) 
-                glyphToChar.setdefault(glyph, []).append(unichar)
+            start, endpoint, delta = startCount[n], endCount[n] + 1, idDelta[n]
+            if (start >= endpoint):
+                continue
+            codes = range(start, endpoint)
+            if (idRangeOffset[n] == 0):
+                glyphs = [(unichar + delta) & 0xFFFF for unichar in codes]
+            else:
+                # glyph index array (glyphs after the end of the table are 0)
+                offset = idRangeOffset_start + 2 * n + idRangeOffset[n]
+                valid = max(0, min(endpoint - start, (limit - offset + 1) // 2))
+                glyphs = [glyph and (glyph + delta) & 0xFFFF for glyph in
+                          unpack_from(">%dH" % valid, self.fh, offset)]
+                glyphs += [0] * (endpoint - start - valid)
+            self.addCharGlyphs(codes, glyphs, glyphToChar, charToGlyph)
 
     # CMAP Format 12
     def getCMAP12(self, unicode_cmap_offset, glyphToChar, charToGlyph):
@@ -1014,22 +1014,27 @@ class TTFontFile:
 
         if 2 + 2 + 4 + 4 + 4 + grpCount * 3 * 4 > length:
             die("TTF format 12 cmap table too small")  
+        groups = unpack_from(">%dL" % (grpCount * 3), self.fh, self._pos)
         for n in range(grpCount):
-            startCharCode = self.read_ulong()
-            endCharCode = self.read_ulong()
-            glyph = self.read_ulong()
-            for unichar in range(startCharCode, endCharCode + 1):
-                charToGlyph[unichar] = glyph
-                if (unichar < 196608):
-                    self.maxUniChar = max(unichar, self.maxUniChar) 
-                glyphToChar.setdefault(glyph, []).append(unichar)
-                glyph += 1
-            
-            
+            startCharCode, endCharCode, glyph = groups[n * 3:n * 3 + 3]
+            if (startCharCode > endCharCode):
+                continue
+            self.addCharGlyphs(range(startCharCode, endCharCode + 1),
+                               range(glyph, glyph + endCharCode - startCharCode + 1),
+                               glyphToChar, charToGlyph)
+
+    def addCharGlyphs(self, codes, glyphs, glyphToChar, charToGlyph):
+        "Map a range of character codes to their glyphs (cmap segment)"
+        charToGlyph.update(zip(codes, glyphs))
+        for unichar, glyph in zip(codes, glyphs):
+            glyphToChar.setdefault(glyph, []).append(unichar)
+        if (codes[0] < 196608):
+            self.maxUniChar = max(min(codes[-1], 196607), self.maxUniChar)
+
 
     # Put the TTF file together
     def endTTFile(self, stm): 
-        stm = b('')
+        stm = bytearray()
         numTables = count(self.otables)
         searchRange = 1
         entrySelector = 0
@@ -1057,19 +1062,17 @@ class TTFontFile:
                 head_start = offset 
             stm += tag.encode("latin1")
             checksum = calcChecksum(data)
-            stm += pack(">HH", checksum[0],checksum[1])
-            stm += pack(">LL", offset, strlen(data))
-            paddedLength = (strlen(data)+3)&~3
+            stm += pack(">HHLL", checksum[0], checksum[1], offset, len(data))
+            paddedLength = (len(data)+3)&~3
             offset = offset + paddedLength
 
-        # Table data
+        # Table data (padded to 4 bytes)
         for tag, data in sorted_tables: 
-            data += b("\0\0\0")
-            stm += substr(data,0,(strlen(data)&~3))
+            stm += data
+            stm += b("\0") * (-len(data) % 4)
 
         checksum = calcChecksum(stm)
         checksum = sub32((0xB1B0,0xAFBA), checksum)
-        chk = pack(">HH", checksum[0],checksum[1])
-        stm = self.splice(stm,(head_start + 8),chk)
-        return stm 
+        pack_into(">HH", stm, head_start + 8, checksum[0], checksum[1])
+        return bytes(stm)
     
@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"Simple performance benchmarks for PyFPDF (not part of the test suite)"
+
+# Usage: python benchmark.py [name ...]
+# (run without arguments to execute all benchmarks)
+
+from __future__ import with_statement
+
+import os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import fpdf
+from fpdf import FPDF
+
+def timeit(fn, *args, **kwargs):
+    "Return the best wall time (in seconds) of three runs"
+    best = None
+    for i in range(3):
+        t0 = time.time()
+        fn(*args, **kwargs)
+        t = time.time() - t0
+        if best is None or t < best:
+            best = t
+    return best
+
+def report_pages(nb):
+    "Build a table-like report with nb pages, return the PDF as bytes"
+    pdf = FPDF()
+    pdf.alias_nb_pages()
+    pdf.set_font('Arial', '', 8)
+    for p in range(nb):
+        pdf.add_page()
+        for i in range(40):
+            pdf.cell(30, 5, 'Row %d' % i, 1, 0)
+            pdf.cell(30, 5, '%0.2f' % (i * 1.5), 1, 0, 'R')
+            pdf.cell(0, 5, 'Page %d of {nb}' % (p + 1), 1, 1)
+    return pdf.output(dest='S')
+
+def bench_pages():
+    "Generation time should scale linearly with the page count"
+    print("pages      total (s)   per page (ms)")
+    for nb in (250, 500, 1000, 2000, 4000):
+        t = timeit(report_pages, nb)
+        print("%5d %14.3f %15.3f" % (nb, t, t * 1000.0 / nb))
+
+def dense_report(nb, compress_workers):
+    "Build a report with dense pages (without closing it)"
+    pdf = FPDF(compress_workers = compress_workers)
+    pdf.set_font('Courier', '', 6)
+    for p in range(nb):
+        pdf.add_page()
+        for i in range(90):
+            pdf.cell(0, 3, ' '.join(['%08.3f' % ((p * i * j) % 997 / 7.0)
+                                     for j in range(16)]), 0, 1)
+    return pdf
+
+def bench_workers():
+    "Document closing time (stream compression) with worker threads"
+    print("workers   close (s)")
+    for workers in (0, 2, 4, 8):
+        best = None
+        for i in range(3):
+            pdf = dense_report(300, workers)
+            t0 = time.time()
+            pdf.close()
+            t = time.time() - t0
+            if best is None or t < best:
+                best = t
+        print("%7d %11.3f" % (workers, best))
+
+def bench_levels():
+    "Document size and closing time by compression level"
+    print("level   close (s)    size (KB)")
+    for level in (1, 6, 9):
+        best = None
+        for i in range(3):
+            pdf = dense_report(100, 0)
+            pdf.set_compression(True, level)
+            t0 = time.time()
+            pdf.close()
+            t = time.time() - t0
+            if best is None or t < best:
+                best = t
+        print("%5d %11.3f %12.1f" % (level, best, len(pdf.buffer) / 1024.0))
+
+def linked_report(nb, object_streams):
+    "Build a report with many links, return the PDF as bytes"
+    pdf = FPDF()
+    if object_streams:
+        pdf.set_object_streams()
+    pdf.set_font('Arial', '', 8)
+    for p in range(nb):
+        pdf.add_page()
+        for i in range(20):
+            pdf.cell(0, 5, 'Item %d' % i, 0, 1,
+                     link = 'http://example.com/%d/%d' % (p, i))
+    return pdf.output(dest='S')
+
+def bench_objstm():
+    "Document size and time with object streams (PDF 1.5)"
+    print("objstm    time (s)    size (KB)")
+    for object_streams in (False, True):
+        t = timeit(linked_report, 500, object_streams)
+        size = len(linked_report(500, object_streams))
+        print("%6s %11.3f %12.1f" % (object_streams, t, size / 1024.0))
+
+class StampedReport(FPDF):
+    "Report with a complex letterhead, drawn or placed as a stamp"
+    stamped = False
+
+    def letterhead(self):
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 10, 'Letterhead', 1, 0, 'C')
+        for i in range(60):
+            self.line(10, 22 + i * 0.3, 200, 22 + i * 0.3)
+
+    def header(self):
+        if not self.stamped:
+            self.letterhead()
+        else:
+            if not hasattr(self, 'letterhead_stamp'):
+                with self.record_stamp() as self.letterhead_stamp:
+                    self.letterhead()
+            self.place_stamp(self.letterhead_stamp)
+        self.set_y(45)
+
+def stamped_report(nb, stamped):
+    "Build a report with a letterhead on each page, return the PDF as bytes"
+    pdf = StampedReport()
+    pdf.stamped = stamped
+    pdf.set_font('Arial', '', 8)
+    for p in range(nb):
+        pdf.add_page()
+        pdf.cell(0, 5, 'Page %d' % p)
+    return pdf.output(dest='S')
+
+def bench_stamps():
+    "Repeated letterhead drawn on each page or placed as a stamp"
+    print("stamped   time (s)    size (KB)")
+    for stamped in (False, True):
+        t = timeit(stamped_report, 1000, stamped)
+        size = len(stamped_report(1000, stamped))
+        print("%7s %10.3f %12.1f" % (stamped, t, size / 1024.0))
+
+def table_report(nb, precision):
+    "Build a table with borders, return the PDF as bytes"
+    pdf = FPDF()
+    pdf.set_compression(False)
+    pdf.set_precision(*precision)
+    pdf.set_font('Arial', '', 8)
+    for p in range(nb):
+        pdf.add_page()
+        for i in range(50):
+            pdf.cell(30, 5, 'Row %d' % i, 1, 0)
+            pdf.cell(30, 5, '%0.2f' % (i * 1.5), 'LR', 0, 'R')
+            pdf.cell(0, 5, 'x', 'B', 1)
+    return pdf.output(dest='S')
+
+def bench_precision():
+    "Table generation time and size by number format of operators"
+    print("digits  trim   time (s)    size (KB)")
+    for precision in ((2, False), (2, True), (1, True)):
+        t = timeit(table_report, 200, precision)
+        size = len(table_report(200, precision))
+        print("%6d %5s %10.3f %12.1f" % (precision + (t, size / 1024.0)))
+
+def aligned_report(nb, cache_size):
+    "Build a report with aligned cells (measured strings), return the PDF"
+    pdf = FPDF()
+    pdf.set_width_cache(cache_size)
+    pdf.set_font('Arial', '', 8)
+    for p in range(nb):
+        pdf.add_page()
+        for i in range(50):
+            pdf.cell(40, 5, 'Category %d' % (i % 10), 1, 0, 'C')
+            pdf.cell(40, 5, '%0.2f' % (i % 20 * 2.5), 1, 0, 'R')
+            pdf.cell(0, 5, 'Subtotal', 1, 1, 'R')
+    return pdf
+
+def bench_widths():
+    "Report with aligned cells (cell only), with and without string width cache"
+    print("cache   time (s)      hits   misses")
+    for cache_size in (0, 1024):
+        t = timeit(aligned_report, 200, cache_size)
+        pdf = aligned_report(200, cache_size)
+        print("%5d %10.3f %9d %8d" % (cache_size, t, pdf.width_cache_hits,
+                                      pdf.width_cache_misses))
+
+PARAGRAPH = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do "
+             "eiusmod tempor incididunt ut labore et dolore magna aliqua. ") * 40
+
+def measure_paragraphs(nb):
+    "Measure and split long paragraphs (without output)"
+    pdf = FPDF()
+    pdf.set_font('Times', '', 10)
+    pdf.add_page()
+    for i in range(nb):
+        pdf.get_string_width(PARAGRAPH)
+        pdf.multi_cell(0, 5, PARAGRAPH, split_only=True)
+
+def bench_measure():
+    "Measuring and splitting long paragraphs in a core font"
+    print("paragraphs   time (s)")
+    for nb in (50, 100, 200):
+        print("%10d %10.3f" % (nb, timeit(measure_paragraphs, nb)))
+
+FONT = os.path.join(os.path.dirname(__file__), 'font',
+                    'DejaVuSansCondensed.ttf')
+
+def wrap_text(size, unicode_font):
+    "Wrap a text block of size bytes with multi_cell (without output)"
+    pdf = FPDF()
+    if unicode_font:
+        pdf.add_font('DejaVu', '', FONT, uni=True)
+        pdf.set_font('DejaVu', '', 10)
+    else:
+        pdf.set_font('Times', '', 10)
+    pdf.add_page()
+    text = (PARAGRAPH * (size // len(PARAGRAPH) + 1))[:size]
+    return len(pdf.multi_cell(0, 5, text, split_only=True))
+
+def bench_wrap():
+    "Wrapping large text blocks (line breaking only)"
+    print("font        size (KB)   time (s)    lines")
+    for unicode_font in (False, True):
+        if unicode_font and not os.path.exists(FONT):
+            print("(%s not found, skipping TTF)" % FONT)
+            continue
+        for size in (10000, 100000):
+            t = timeit(wrap_text, size, unicode_font)
+            print("%-8s %12d %10.3f %8d" % (unicode_font and 'TTF' or 'core',
+                size // 1000, t, wrap_text(size, unicode_font)))
+
+CELLS = ["Item %d: " % i + "lorem ipsum dolor sit amet " * (i % 9)
+         for i in range(5000)]
+
+def row_heights(bulk):
+    "Count the lines of many table cells, one by one or all at once"
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font('Arial', '', 9)
+    if bulk:
+        return pdf.measure_lines(CELLS, 45, count_only=True)
+    return [len(pdf.multi_cell(45, 5, text, split_only=True))
+            for text in CELLS]
+
+def bench_rows():
+    "Line counts of 5000 table cells (row heights)"
+    print("method          time (s)")
+    print("multi_cell %13.3f" % timeit(row_heights, False))
+    print("measure_lines %10.3f" % timeit(row_heights, True))
+
+def font_documents(nb, shared):
+    "Create nb documents using a TTF font (metrics shared or reloaded)"
+    for i in range(nb):
+        if not shared:
+            fpdf.evict_ttfont()
+        pdf = FPDF()
+        pdf.add_font('DejaVu', '', FONT, uni=True)
+
+def bench_fonts():
+    "Adding a TTF font to many documents (metrics cached in the process)"
+    if not os.path.exists(FONT):
+        print("(%s not found)" % FONT)
+        return
+    print("shared   time (s)")
+    for shared in (False, True):
+        print("%6s %10.3f" % (shared, timeit(font_documents, 100, shared)))
+
+def font_invoices(nb, cache_size):
+    "Create nb invoices using a TTF font (subsets reused or made again)"
+    fpdf.set_global("FPDF_SUBSET_CACHE_SIZE", cache_size)
+    fpdf.evict_ttfont()
+    for i in range(nb):
+        pdf = FPDF()
+        pdf.add_font('DejaVu', '', FONT, uni=True)
+        pdf.add_page()
+        pdf.set_font('DejaVu', '', 10)
+        for j in range(20):
+            pdf.cell(0, 5, 'Item %d: %0.2f' % (j, (i * j) % 97 / 3.0), 0, 1)
+        pdf.output(dest='S')
+    fpdf.set_global("FPDF_SUBSET_CACHE_SIZE", 32)
+
+def bench_subsets():
+    "Creating 100 invoices with a TTF font (font subsets cached or not)"
+    if not os.path.exists(FONT):
+        print("(%s not found)" % FONT)
+        return
+    print("cache    time (s)")
+    for cache_size in (0, 32):
+        print("%5d %11.3f" % (cache_size, timeit(font_invoices, 100, cache_size)))
+
+def parse_font(fname, subset):
+    "Parse a TTF file (metrics) and build a subset with the given chars"
+    ttf = fpdf.ttfonts.TTFontFile()
+    ttf.getMetrics(fname)
+    if subset:
+        ttf.makeSubset(fname, subset)
+
+def bench_ttf():
+    "Parsing TTF files (metrics and subsets, extra fonts in FPDF_BENCH_FONTS)"
+    fonts = [FONT] + [fname for fname in
+        os.environ.get('FPDF_BENCH_FONTS', '').split(os.pathsep) if fname]
+    print("font                          metrics (s)   subset (s)")
+    for fname in fonts:
+        if not os.path.exists(fname):
+            print("(%s not found)" % fname)
+            continue
+        subset = list(range(32, 127)) + list(range(0xC0, 0x180))
+        t = timeit(parse_font, fname, None)
+        print("%-28s %12.3f %12.3f" % (os.path.basename(fname)[:28], t,
+                                      timeit(parse_font, fname, subset) - t))
+
+BENCHMARKS = [
+    ('pages', bench_pages),
+    ('workers', bench_workers),
+    ('levels', bench_levels),
+    ('objstm', bench_objstm),
+    ('stamps', bench_stamps),
+    ('precision', bench_precision),
+    ('widths', bench_widths),
+    ('measure', bench_measure),
+    ('wrap', bench_wrap),
+    ('rows', bench_rows),
+    ('fonts', bench_fonts),
+    ('ttf', bench_ttf),
+    ('subsets', bench_subsets),
+]
+
+def main(names):
+    for name, bench in BENCHMARKS:
+        if names and name not in names:
+            continue
+        print("== %s: %s" % (name, bench.__doc__))
+        bench()
+        print("")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
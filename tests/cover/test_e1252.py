@@ -4,7 +4,7 @@
 
 #PyFPDF-cover-test:format=PDF
 #PyFPDF-cover-test:fn=e1252.pdf
-#PyFPDF-cover-test:hash=e84f193be84c1162538d64e28ee054b6
+#PyFPDF-cover-test:hash=b649a8c75502193948fde02d611024e4
 
 #
 # Please note: with current PyFPDF state four codepoints:
@@ -8,7 +8,7 @@ __license__ = "LGPL 3.0"
 
 #PyFPDF-cover-test:format=PDF
 #PyFPDF-cover-test:fn=invoice.pdf
-#PyFPDF-cover-test:hash=5844bbebe3e33b0ac9cc15ac39327a81
+#PyFPDF-cover-test:hash=239a480fb6872770266e2c7b8ef5158a
 #PyFPDF-cover-test:res=invoice.csv
 
 import common
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+"Test object streams and cross-reference stream (PDF 1.5)"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=object_streams.pdf
+#PyFPDF-cover-test:hash=689a05b82f9d70b8a4340b96ba0fb260
+
+import common
+from fpdf import FPDF
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    for object_streams in (False, True):
+        pdf = FPDF()
+        if nostamp:
+            pdf._putinfo = lambda: common.test_putinfo(pdf)
+        if object_streams:
+            pdf.set_object_streams()
+        pdf.set_font('Arial', '', 12)
+        for p in range(120):
+            pdf.add_page(p % 2 and 'L' or 'P')
+            pdf.cell(0, 10, "Page %d" % (p + 1), 0, 1, link = "http://example.com")
+        if not object_streams:
+            classic = pdf.output(dest = 'S')
+    data = pdf.output(dest = 'S')
+    assert data.startswith(b"%PDF-1.5"), "Version not raised"
+    assert b"/Type /ObjStm" in data and b"/Type /XRef" in data
+    assert b"\nxref\n" not in data, "Classic xref table written"
+    assert len(data) < len(classic) / 2, "Object streams not smaller"
+    pdf.output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
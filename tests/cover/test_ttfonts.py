@@ -45,6 +45,15 @@ def dotest(outputname, nostamp):
     assert not diff, "Check char widths"
     # for checking assertion works ttf.charWidths[1] = 600
     ## assert tuple(ttf.charWidths) == tuple(char_widths)
+    # subset of accented letters (composite glyphs): components found with the
+    # index built by getMetrics or read from the glyf table
+    assert ttf.compositeGlyphs, "Check composite glyphs"
+    subset = list(range(32, 127)) + [0xC0, 0xC9, 0xCE, 0xF5, 0xFC, 0x165, 0x16F, 0x17D]
+    assert TTFontFile().makeSubset(ttffile, subset, ttf.compositeGlyphs) == \
+        TTFontFile().makeSubset(ttffile, subset), "Check composite glyph index"
+    # repeated code points are included once
+    assert TTFontFile().makeSubset(ttffile, subset + subset[::2]) == \
+        TTFontFile().makeSubset(ttffile, subset), "Check repeated code points"
     
 if __name__ == "__main__":
     common.testmain(__file__, dotest)
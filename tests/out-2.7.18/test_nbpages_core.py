@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"Test alias_nb_pages replacement in cell, text, write and multi_cell"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=nbpages_core.pdf
+#PyFPDF-cover-test:hash=dacf5c363c82bc675a6ac85ac18fe606
+
+import common
+from fpdf import FPDF
+
+class PDF(FPDF):
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.cell(0, 10, 'Page %d of {nb}' % self.page_no(), 0, 0, 'C')
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    pdf = PDF()
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    pdf.set_compression(False)
+    pdf.alias_nb_pages()
+    pdf.set_font('Times', '', 12)
+    for i in range(3):
+        pdf.add_page()
+        pdf.text(10, 10, "text {nb}")
+        pdf.write(5, "write {nb}\n")
+        pdf.multi_cell(0, 5, "multi_cell {nb} " * 20)
+        pdf.cell(0, 5, "no alias here", 0, 1)
+    data = pdf.output(dest = 'S')
+    assert b"{nb}" not in data, "Alias not replaced"
+    for s in (b"Page 3 of 3", b"text 3", b"write 3", b"multi_cell 3"):
+        assert s in data, "Missing " + repr(s)
+    pdf.output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"Test stamps (form xobjects) for repeated content"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=stamp.pdf
+#PyFPDF-cover-test:hash=0bf4b4029a96f731885b1e1bcac4e8a3
+#PyFPDF-cover-test:res=../tutorial/logo.png
+
+import os
+import common
+from fpdf import FPDF
+
+class PDF(FPDF):
+    stamped = True
+
+    def letterhead(self):
+        self.image(os.path.join(common.basepath, "../tutorial/logo.png"),
+                   10, 8, 33)
+        self.set_font('Arial', 'B', 15)
+        self.set_draw_color(0, 0, 200)
+        self.cell(0, 10, 'Letterhead, {nb} pages', 1, 0, 'C')
+        for i in range(20):
+            self.line(10, 22 + i, 200, 22 + i)
+
+    def header(self):
+        if not self.stamped:
+            self.letterhead()
+        else:
+            if not hasattr(self, 'stamp'):
+                with self.record_stamp() as self.stamp:
+                    self.letterhead()
+            self.place_stamp(self.stamp)
+        self.set_y(45)
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    for stamped in (False, True):
+        pdf = PDF()
+        pdf.stamped = stamped
+        if nostamp:
+            pdf._putinfo = lambda: common.test_putinfo(pdf)
+        pdf.set_compression(False)
+        pdf.alias_nb_pages()
+        pdf.set_font('Times', '', 12)
+        for p in range(30):
+            pdf.add_page()
+            pdf.cell(0, 10, "Body of page %d" % (p + 1), 0, 1)
+        if not stamped:
+            plain = pdf.output(dest = 'S')
+    data = pdf.output(dest = 'S')
+    assert data.count(b"/Subtype /Form") == 1, "Stamp not shared"
+    assert data.count(b"/S1 Do") == 30, "Stamp not placed"
+    assert b"Letterhead, 30 pages" in data, "Alias not replaced"
+    # font and colors set while recording only appear in the stamp
+    assert data.count(b"/F2 15.00 Tf") == 1, "Font set outside stamp"
+    assert data.count(b"0.000 0.000 0.784 RG") == 1, "Color set outside stamp"
+    assert len(data) < len(plain) / 2
+    pdf.output(outputname, 'F')
+    # stamp placed on larger pages (not clipped), links not recorded
+    pdf = FPDF()
+    pdf.set_compression(False)
+    pdf.add_page()
+    pdf.set_font('Arial', '', 12)
+    with pdf.record_stamp() as stamp:
+        pdf.cell(0, 10, 'Stamp with link', 0, 0, '', 0, 'http://example.com')
+        pdf.rect(10, 10, 20, 5)
+    pdf.add_page('L')
+    pdf.place_stamp(stamp)
+    pdf.add_page('L')
+    pdf.place_stamp(stamp, 10, 20)
+    data = pdf.output(dest = 'S')
+    assert b"/Annots" not in data, "Link recorded in stamp"
+    assert b"/BBox [-28.35 246.61 841.89 898.58]" in data, "Stamp clipped"
+    # recorded at 10 mm from the top: placed at 10 and 30 mm from the top
+    # of the landscape pages
+    assert b"28.35 813.54 56.69 -14.17 re S" in data, "Rect not recorded"
+    assert b"q 1 0 0 1 0.00 -246.61 cm /S1 Do Q" in data, "Bad position"
+    assert b"q 1 0 0 1 28.35 -303.30 cm /S1 Do Q" in data, "Bad position"
+    assert abs(813.54 - 246.61 - (595.28 - 10 * pdf.k)) < 0.01
+    assert abs(813.54 - 303.30 - (595.28 - 30 * pdf.k)) < 0.01
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
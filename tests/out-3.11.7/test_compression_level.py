@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"Test compression levels and per-stream compression policy"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=compression_level.pdf
+#PyFPDF-cover-test:hash=c23a0675180ab6e61aa0887b2fde89eb
+#PyFPDF-cover-test:res=flower2.jpg
+
+import os
+import common
+from fpdf import FPDF, CompressionPolicy
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    jpeg = open(os.path.join(common.basepath, "flower2.jpg"), "rb").read()
+    # page content not compressed, then levels 1 and 9
+    data = []
+    for level, policy in ((-1, CompressionPolicy(9, levels = {'page': None})),
+                          (1, None), (9, None)):
+        pdf = FPDF()
+        if nostamp:
+            pdf._putinfo = lambda: common.test_putinfo(pdf)
+        pdf.set_compression(True, level, policy)
+        pdf.set_font('Courier', '', 10)
+        pdf.add_page()
+        for i in range(60):
+            pdf.cell(0, 4, "Line %d: %s" % (i, "0123456789" * (i % 7)), 0, 1)
+        pdf.image(os.path.join(common.basepath, "flower2.jpg"), 10, 10, 50)
+        data.append(pdf.output(dest = 'S'))
+    plain, fast, best = data
+    assert b"Line 59" in plain, "Page content compressed"
+    assert len(best) <= len(fast), "Level 9 output larger than level 1"
+    # JPEG data is never recompressed
+    assert jpeg in fast and jpeg in best, "JPEG data was recompressed"
+    pdf.output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+"Test core fonts encoding option (ASCII and windows-1252 texts, bad codec)"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=core_encoding.pdf
+#PyFPDF-cover-test:hash=8bcd0f42cb23246206227a05ebedd015
+
+import common
+from fpdf import FPDF
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    pdf = FPDF()
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    try:
+        pdf.set_doc_option("core_fonts_encoding", "no-such-encoding")
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("Unknown encoding accepted")
+    pdf.set_doc_option("core_fonts_encoding", "windows-1252")
+    pdf.add_page()
+    pdf.set_font('Arial', '', 14)
+    for text in (u"Plain ASCII 12.50", u"Euro € 12,50 – caf\xe9"):
+        encoded = text.encode("windows-1252")
+        if common.PY3K:
+            encoded = encoded.decode("latin-1")
+        assert pdf.normalize_text(text) == encoded
+        pdf.cell(0, 10, text, 1, 1, 'R')
+        pdf.text(20, pdf.get_y() + 10, text)
+        pdf.ln(15)
+    pdf.multi_cell(60, 8, u"ASCII text in a justified cell " * 3, 1, 'J')
+    pdf.output(outputname, 'F')
+    # the encoding can also be assigned directly
+    pdf.core_fonts_encoding = "latin-1"
+    try:
+        pdf.normalize_text(u"Euro \u20ac")
+    except UnicodeEncodeError:
+        pass
+    else:
+        raise AssertionError("Encoding not changed")
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+"Test alias_nb_pages replacement in content output before the call"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=nbpages_order.pdf
+#PyFPDF-cover-test:hash=f861c12cc3f2003527fd7c1960cd7164
+
+import common
+from fpdf import FPDF
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    pdf = FPDF()
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    pdf.set_compression(False)
+    pdf.add_page()
+    pdf.set_font('Times', '', 12)
+    with pdf.record_stamp() as stamp:
+        pdf.text(10, 280, "stamp {nb}")
+    # before the alias is defined
+    pdf.cell(0, 5, "cell {nb}", 0, 1)
+    # page content written directly
+    pdf._out("BT 10 50 Td (out {nb}) Tj ET")
+    pdf.alias_nb_pages()
+    pdf.cell(0, 5, "after {nb}", 0, 1)
+    pdf.place_stamp(stamp)
+    pdf.add_page()
+    pdf.place_stamp(stamp)
+    data = pdf.output(dest = 'S')
+    assert b"{nb}" not in data, "Alias not replaced"
+    for s in (b"stamp 2", b"cell 2", b"out 2", b"after 2"):
+        assert s in data, "Missing " + repr(s)
+    pdf.output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"Test streaming mode (pages written to a file-like object as finished)"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=stream.pdf
+#PyFPDF-cover-test:hash=27594fd7730cf05eeb1f3f7d21b1b004
+#PyFPDF-cover-test:res=flower2.jpg
+
+import common
+from fpdf import FPDF
+
+import os
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    with open(outputname, "wb") as f:
+        pdf = FPDF(stream = f)
+        if nostamp:
+            pdf._putinfo = lambda: common.test_putinfo(pdf)
+        pdf.set_font('Arial', '', 12)
+        for i in range(50):
+            if i % 10 == 0:
+                pdf.add_page()
+                pdf.image(os.path.join(common.basepath, "flower2.jpg"), 150, 10)
+            pdf.cell(0, 10, "Line %d" % i, 0, 1, '', 0, "http://pyfpdf.rtfd.org")
+            if i % 10 == 1:
+                # previous page content must be already written
+                assert pdf.page == 1 or not pdf.pages[pdf.page - 1]["content"]
+        try:
+            pdf.alias_nb_pages()
+        except RuntimeError:
+            pass
+        else:
+            assert False, "alias_nb_pages should fail in streaming mode"
+        pdf.output()
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+"Test string widths in core fonts (width tables)"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=charwidths.pdf
+#PyFPDF-cover-test:hash=2461d09b32c0c083ece103725afc8c45
+
+import common
+from fpdf import FPDF
+from fpdf.fonts import fpdf_charwidths
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    pdf = FPDF()
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    pdf.add_page()
+    text = u"Width of (all) characters: caf\xe9 \xe0 \xab12.50\xbb"
+    for font in ('courier', 'helvetica', 'times', 'symbol', 'zapfdingbats'):
+        for style in ('', 'B', 'BI'):
+            pdf.set_font(font, style, 14)
+            key = pdf.current_font['name']
+            cw = fpdf_charwidths[font + ('' if font in ('symbol', 'zapfdingbats') else style)]
+            expected = sum([cw[c] for c in pdf.normalize_text(text)]) * 14 / 1000.0
+            width = pdf.get_string_width(text)
+            assert abs(width * pdf.k - expected) < 1e-6, "Bad width in " + key
+            pdf.cell(width, 8, text, 1, 1)
+    pdf.output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
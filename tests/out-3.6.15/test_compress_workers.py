@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+"Test compression in worker threads (output must not change)"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=compress_workers.pdf
+#PyFPDF-cover-test:hash=77181d89acf5d8975917b30c2f142ccf
+
+import common
+from fpdf import FPDF
+
+def document(compress_workers, nostamp):
+    pdf = FPDF(compress_workers = compress_workers)
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    pdf.alias_nb_pages()
+    pdf.set_font('Courier', '', 10)
+    for p in range(20):
+        pdf.add_page()
+        for i in range(30):
+            pdf.cell(0, 8, "Page %d of {nb}, line %d" % (p + 1, i), 0, 1)
+    return pdf
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    data = document(0, nostamp).output(dest = 'S')
+    pdf = document(3, nostamp)
+    assert pdf.output(dest = 'S') == data, "Output differs with workers"
+    pdf.output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+"Test graphics state tracking (redundant operators are not output)"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=gstate.pdf
+#PyFPDF-cover-test:hash=284283a86e8100364a8ab2e31d14a1c8
+
+import common
+from fpdf import FPDF
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    pdf = FPDF()
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    pdf.set_compression(False)
+    pdf.add_page()
+    for i in range(10):
+        pdf.set_draw_color(255, 0, 0)
+        pdf.set_fill_color(0, 0, 255)
+        pdf.set_line_width(0.5)
+        pdf.set_font('Arial', '', 10)
+        pdf.set_font_size(10)
+        pdf.set_stretching(100)
+        pdf.rect(10, 10 + i * 10, 50, 5, 'DF')
+    # state changed inside a rotation is restored afterwards
+    pdf.rotate(45, 100, 100)
+    pdf.set_draw_color(0, 255, 0)
+    pdf.rect(100, 100, 20, 20)
+    pdf.rotate(0)
+    pdf.set_draw_color(0, 255, 0)
+    pdf.rect(150, 100, 20, 20)
+    data = pdf.output(dest = 'S')
+    assert data.count(b"1.000 0.000 0.000 RG") == 1
+    assert data.count(b"0.000 0.000 1.000 rg") == 1
+    assert data.count(b"1.42 w") == 1
+    assert data.count(b"Tf ET") == 1
+    assert b"Tz" not in data
+    assert data.count(b"0.000 1.000 0.000 RG") == 2
+    pdf.output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+"Test line breaking of multi_cell and write (spaces, long words, new lines)"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=linebreak.pdf
+#PyFPDF-cover-test:hash=322b7df38997049035bc7d6972d33db5
+
+import common
+from fpdf import FPDF
+
+TEXT = ("Lorem ipsum dolor sit amet,  consectetur adipiscing elit.\n"
+        "Pneumonoultramicroscopicsilicovolcanoconiosis is a long word\n\n"
+        "sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. ")
+
+def split_text(pdf, w, txt):
+    "Reference line breaking, measuring the text a character at a time"
+    wmax = w - 2 * pdf.c_margin
+    lines = []
+    for par in txt.rstrip("\n").split("\n"):
+        while True:
+            i = 0
+            while i < len(par) and pdf.get_string_width(par[:i + 1]) <= wmax:
+                i += 1
+            if i == len(par):
+                lines.append(par)
+                break
+            sep = par.rfind(' ', 0, i + 1)
+            if sep >= 0:
+                lines.append(par[:sep])
+                par = par[sep + 1:]
+            else:
+                lines.append(par[:max(i, 1)])
+                par = par[max(i, 1):]
+    return lines
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    pdf = FPDF()
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    pdf.add_page()
+    pdf.set_font('Times', '', 12)
+    for w in (5, 30, 60.5, 120):
+        lines = pdf.multi_cell(w, 5, TEXT, split_only=True)
+        assert lines == split_text(pdf, w, TEXT), "Bad split at width %s" % w
+    pdf.multi_cell(60, 5, TEXT, 1, 'J')
+    pdf.ln(5)
+    pdf.set_x(150)
+    pdf.write(5, TEXT * 2)
+    pdf.output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+"Test measure_lines (row heights of a table computed before drawing it)"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=measure_lines.pdf
+#PyFPDF-cover-test:hash=91e8e6eacdc8b716e274b9aaa06e0ad0
+
+import common
+from fpdf import FPDF
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    pdf = FPDF()
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    texts = ["Item %d: " % i + "lorem ipsum dolor " * (i % 7) for i in range(40)]
+    # before any page or font
+    counts = pdf.measure_lines(texts, 50, 'Times', '', 10, count_only=True)
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 14)
+    lines = pdf.measure_lines(texts, 50, 'Times', '', 10)
+    assert counts == [len(l) for l in lines]
+    assert pdf.current_font['name'] == 'Helvetica-Bold'
+    assert 'times' not in pdf.fonts
+    pdf.set_font('Times', '', 10)
+    assert lines == [pdf.multi_cell(50, 5, t, split_only=True) for t in texts]
+    for text, n in zip(texts, counts):
+        page, y = pdf.page_no(), pdf.get_y()
+        pdf.multi_cell(50, 5, text, 1, 'J')
+        if pdf.page_no() == page:
+            assert abs(pdf.get_y() - y - 5 * n) < 1e-6
+    pdf.output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
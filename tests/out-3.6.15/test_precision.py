@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+"Test number format of page content operators"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=precision.pdf
+#PyFPDF-cover-test:hash=9ab3d44b7377d6949a71b44ccc867492
+
+import common
+from fpdf import FPDF
+
+def document(nostamp, *precision):
+    pdf = FPDF()
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    pdf.set_compression(False)
+    pdf.set_precision(*precision)
+    pdf.set_font('Arial', '', 10)
+    pdf.add_page()
+    for i in range(20):
+        pdf.cell(40, 10, "Cell %d.00" % i, 1, 0, 'C')
+        pdf.cell(0, 10, "", 'B', 1)
+    pdf.text(10, 250, "1.50 0.00")
+    pdf.rect(10, 260, 50, 10)
+    pdf.ellipse(100, 260, 50, 10)
+    return pdf
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    default = document(nostamp).output(dest = 'S')
+    assert b"28.35 813.54 113.39 -28.35 re" in default
+    pdf = document(nostamp, 1, True)
+    data = pdf.output(dest = 'S')
+    assert b"28.4 813.5 113.4 -28.3 re S" in data
+    assert b"BT 65.3 768 Td" in data
+    assert b".0 " not in data.replace(b".00 ", b""), "Zeros not trimmed"
+    # text is not changed
+    assert b"(1.50 0.00) Tj" in data and b"(Cell 3.00) Tj" in data
+    assert len(data) < len(default)
+    pdf.output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"Test stamps (form xobjects) for repeated content"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=stamp.pdf
+#PyFPDF-cover-test:hash=319403fadc76e2b364b6573160b184a0
+#PyFPDF-cover-test:res=../tutorial/logo.png
+
+import os
+import common
+from fpdf import FPDF
+
+class PDF(FPDF):
+    stamped = True
+
+    def letterhead(self):
+        self.image(os.path.join(common.basepath, "../tutorial/logo.png"),
+                   10, 8, 33)
+        self.set_font('Arial', 'B', 15)
+        self.set_draw_color(0, 0, 200)
+        self.cell(0, 10, 'Letterhead, {nb} pages', 1, 0, 'C')
+        for i in range(20):
+            self.line(10, 22 + i, 200, 22 + i)
+
+    def header(self):
+        if not self.stamped:
+            self.letterhead()
+        else:
+            if not hasattr(self, 'stamp'):
+                with self.record_stamp() as self.stamp:
+                    self.letterhead()
+            self.place_stamp(self.stamp)
+        self.set_y(45)
+
+def document(stamped, nostamp):
+    pdf = PDF()
+    pdf.stamped = stamped
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    pdf.alias_nb_pages()
+    pdf.set_font('Times', '', 12)
+    for p in range(30):
+        pdf.add_page()
+        pdf.cell(0, 10, "Body of page %d" % (p + 1), 0, 1)
+    return pdf
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    plain = document(False, nostamp)
+    plain.set_compression(False)
+    pdf = document(True, nostamp)
+    pdf.set_compression(False)
+    data = pdf.output(dest = 'S')
+    assert data.count(b"/Subtype /Form") == 1, "Stamp not shared"
+    assert data.count(b"/S1 Do") == 30, "Stamp not placed"
+    assert b"Letterhead, 30 pages" in data, "Alias not replaced"
+    # font and colors set while recording only appear in the stamp
+    assert data.count(b"/F2 15.00 Tf") == 1, "Font set outside stamp"
+    assert data.count(b"0.000 0.000 0.784 RG") == 1, "Color set outside stamp"
+    assert len(data) < len(plain.output(dest = 'S')) / 2
+    document(True, nostamp).output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
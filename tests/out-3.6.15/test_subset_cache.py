@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"Test reuse of TrueType font subsets by the next documents"
+
+#PyFPDF-cover-test:res=font/DejaVuSansCondensed.ttf
+
+import common
+import fpdf
+import fpdf.fpdf
+
+import os
+
+def testfile(fontfile, text, nostamp, workers = 0, level = -1):
+    pdf = fpdf.FPDF(compress_workers = workers)
+    pdf.set_compression(True, level)
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    pdf.add_font('DejaVu', '', fontfile, uni = True)
+    pdf.add_page()
+    pdf.set_font('DejaVu', '', 14)
+    pdf.write(8, text)
+    return pdf.output(dest = 'S')
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    subsetpath = os.path.join(os.path.dirname(__file__), "subsets")
+    if os.path.exists(subsetpath):
+        # cleanup dest
+        for item in os.listdir(subsetpath):
+            os.remove(os.path.join(subsetpath, item))
+    else:
+        os.makedirs(subsetpath)
+    fontfile = os.path.join(common.basepath, "font", "DejaVuSansCondensed.ttf")
+    subsets = fpdf.fpdf.FONT_SUBSETS
+    fpdf.set_global("FPDF_CACHE_MODE", 1)
+    fpdf.evict_ttfont()
+
+    # --- memory ---
+    first = testfile(fontfile, "Привет, Hello!", nostamp)
+    assert len(subsets) == 1, "Font subset not cached"
+    # same characters: subset reused
+    assert testfile(fontfile, "Привет, Hello!", nostamp) == first
+    testfile(fontfile, "Hello! Привет,", nostamp)
+    assert len(subsets) == 1, "Font subset cached twice"
+    # other characters: new subset
+    other = testfile(fontfile, "Γειά σου κόσμος", nostamp)
+    assert len(subsets) == 2, "New font subset not cached"
+    assert testfile(fontfile, "Γειά σου κόσμος", nostamp, 2) == other
+    # compression level is part of the key
+    testfile(fontfile, "Γειά σου κόσμος", nostamp, level = 9)
+    assert len(subsets) == 3, "Compressed font subset reused"
+    fpdf.evict_ttfont(fontfile)
+    assert len(subsets) == 0, "Font subsets not evicted"
+
+    # --- disk ---
+    fpdf.set_global("FPDF_SUBSET_CACHE_DIR", subsetpath)
+    try:
+        assert testfile(fontfile, "Привет, Hello!", nostamp) == first
+        assert len(os.listdir(subsetpath)) == 1, "Font subset not stored"
+        fpdf.evict_ttfont()
+        assert testfile(fontfile, "Привет, Hello!", nostamp) == first
+        assert len(subsets) == 1, "Stored font subset not loaded"
+    finally:
+        fpdf.set_global("FPDF_SUBSET_CACHE_DIR", None)
+        fpdf.evict_ttfont()
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"Test string width cache (output must not change)"
+
+#PyFPDF-cover-test:format=PDF
+#PyFPDF-cover-test:fn=width_cache.pdf
+#PyFPDF-cover-test:hash=16417af1589a1d0d7241dbbd790c771f
+
+import common
+from fpdf import FPDF
+
+def document(cache_size, nostamp):
+    pdf = FPDF()
+    if nostamp:
+        pdf._putinfo = lambda: common.test_putinfo(pdf)
+    if cache_size:
+        pdf.set_width_cache(cache_size)
+    pdf.add_page()
+    for i in range(40):
+        pdf.set_font('Arial', i % 2 and 'U' or '', 8 + i % 3)
+        pdf.set_stretching(i % 4 and 100 or 80)
+        pdf.cell(40, 5, "Label %d" % (i % 5), 1, 0, 'R')
+        pdf.cell(40, 5, "%.2f" % (i % 7 * 1.5), 1, 0, 'C')
+        pdf.cell(0, 5, "Total", 1, 1, 'R')
+    return pdf
+
+@common.add_unittest
+def dotest(outputname, nostamp):
+    data = document(0, nostamp).output(dest = 'S')
+    pdf = document(1000, nostamp)
+    assert pdf.width_cache_hits > pdf.width_cache_misses
+    assert pdf.output(dest = 'S') == data, "Output differs with cache"
+    pdf = document(10, nostamp)
+    assert len(pdf.width_cache) == 10, "Cache size exceeded"
+    assert pdf.output(dest = 'S') == data, "Output differs with cache"
+    pdf.output(outputname, 'F')
+
+if __name__ == "__main__":
+    common.testmain(__file__, dotest)